@@ -5,6 +5,8 @@
 from __future__ import absolute_import
 from date_util import *
 from file_util import *
+import hashlib
+import json
 import os
 import re
 import shutil
@@ -12,6 +14,7 @@ import string
 import sys
 import textwrap
 import time
+from types import MappingProxyType
 
 
 def notify(msg):
@@ -42,8 +45,22 @@ def get_capi_file_name(cppname):
   return cppname[:-2] + '_capi.h'
 
 
+# C API names returned by get_capi_name(), keyed by the arguments
+_capi_names = {}
+
+
 def get_capi_name(cppname, isclassname, prefix=None):
   """ Convert a C++ CamelCaps name to a C API underscore name. """
+  key = (cppname, isclassname, prefix)
+  result = _capi_names.get(key)
+  if result is None:
+    result = make_capi_name(cppname, isclassname, prefix)
+    _capi_names[key] = result
+  return result
+
+
+def make_capi_name(cppname, isclassname, prefix=None):
+  """ Create the name returned by get_capi_name(). """
   result = ''
   lastchr = ''
   for chr in cppname:
@@ -123,6 +140,54 @@ def get_comment(body, name):
   return result
 
 
+def get_comment_index(body):
+  """ Build an index of the comments in |body| with a single forward pass.
+    Returns a dictionary mapping the start offset of each line that directly
+    follows a '///' comment block to that comment, using the same rules as
+    get_comment(). Lines without a comment are not included.
+    """
+  result = {}
+  current = []
+  in_block_comment = False
+  start = 0
+  length = len(body)
+  while start < length:
+    end = body.find('\n', start)
+    if end < 0:
+      end = length
+    line = body[start:end].strip()
+    if in_block_comment:
+      # end of multi line /*--cef()--*/
+      if line[-2:] == '*/':
+        in_block_comment = False
+    elif len(line) == 0:
+      current = []
+    # single line /*--cef()--*/
+    elif line[0:2] == '/*' and line[-2:] == '*/':
+      pass
+    # start of multi line /*--cef()--*/
+    elif line[0:2] == '/*':
+      in_block_comment = True
+    elif line[0:3] == '///':
+      # keep the comment line including any leading spaces
+      current.append(line[3:])
+    else:
+      if len(current) > 0:
+        result[start] = current
+        current = []
+    start = end + 1
+  return result
+
+
+def lookup_comment(body, index, pos):
+  """ Return the comment for the declaration at offset |pos| in |body| from
+    the |index| returned by get_comment_index(). If |index| is None comments
+    are not being extracted and an empty comment is returned. """
+  if index is None:
+    return []
+  return index.get(body.rfind('\n', 0, pos) + 1, [])
+
+
 def validate_comment(file, name, comment):
   """ Validate the comment array returned by get_comment(). """
   # Verify that the comment contains beginning and ending '///' as required by
@@ -324,7 +389,7 @@ def dict_to_str(dict):
   """ Convert a dictionary to a string. """
   str = []
   for name in dict.keys():
-    if not isinstance(dict[name], list):
+    if not isinstance(dict[name], (list, tuple)):
       if dict[name] is True:
         # currently a bool value
         str.append(name)
@@ -338,6 +403,27 @@ def dict_to_str(dict):
   return ','.join(str)
 
 
+# Shared attribute dictionaries returned by get_attrib_dict(), keyed by the
+# attribute string.
+_attrib_dicts = {}
+
+
+def get_attrib_dict(str):
+  """ Return a read-only dictionary for an attribute string. Objects with the
+        same attribute string share the dictionary and multiple values for
+        the same key are stored as a tuple. """
+  result = _attrib_dicts.get(str)
+  if result is None:
+    dict = {}
+    for name, val in str_to_dict(str).items():
+      if isinstance(val, list):
+        val = tuple(val)
+      dict[sys.intern(name)] = val
+    result = MappingProxyType(dict)
+    _attrib_dicts[str] = result
+  return result
+
+
 # regex for matching comment-formatted attributes
 _cre_attrib = r'/\*--cef\(([A-Za-z0-9_ ,=:\n]{0,})\)--\*/'
 # regex for matching class and function names
@@ -357,6 +443,473 @@ _cre_space = r'[\s]{1,}'
 # regex for matching optional virtual keyword
 _cre_virtual = r'(?:[\s]{1,}virtual){0,1}'
 
+# regex matching a single token of C++ header contents. Used by tokenize() to
+# walk the contents once instead of running a regex per declaration kind.
+_token_regex = re.compile(
+    r'(?P<space>\s+)'
+    r'|(?P<ident>[A-Za-z_][A-Za-z0-9_]*)'
+    r'|(?P<attrib>/\*--cef\([A-Za-z0-9_ ,=:\n]{0,}\)--\*/)'
+    r'|(?P<comment>//[^\n]*(?:\n[ \t]*//[^\n]*)*|/\*.*?\*/)'
+    r'|(?P<preproc>#(?:\\\n|[^\n])*)'
+    r'|(?P<string>"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\')'
+    r'|(?P<number>[0-9][A-Za-z0-9_.]*)'
+    r'|(?P<punct>.)', re.DOTALL)
+
+# punctuation allowed in function return values, names and typedef values
+# (see _cre_func and _cre_typedef)
+_decl_punct = '<>:,*&'
+
+
+def tokenize(data):
+  """ Split C++ header contents into a list of (kind, start, end) tuples in a
+    single linear pass. Comments (including runs of consecutive '//' lines),
+    strings and preprocessor lines are returned as single tokens so that their
+    contents are never mistaken for declarations.
+    """
+  return [(m.lastgroup, m.start(), m.end())
+          for m in _token_regex.finditer(data)]
+
+
+def _is_line_start(data, pos):
+  """ Returns true if |pos| immediately follows a new line. """
+  return pos > 0 and data[pos - 1] == '\n'
+
+
+def _is_indented_line_start(data, pos):
+  """ Returns true if |pos| is preceded by a new line followed by at least one
+    whitespace character (the '\\n\\s+' prefix used by the class body regexes).
+    """
+  pos -= 1
+  seen_space = False
+  while pos >= 0 and data[pos] in ' \t\r\n\f\v':
+    if data[pos] == '\n' and seen_space:
+      return True
+    seen_space = True
+    pos -= 1
+  return False
+
+
+class _token_scanner:
+  """ Helper for walking a token list produced by tokenize(). """
+
+  def __init__(self, data, tokens, end=None):
+    self.data = data
+    self.tokens = tokens
+    self.end = len(tokens) if end is None else end
+
+  def text(self, index):
+    """ Return the text of the token at |index|. """
+    kind, start, end = self.tokens[index]
+    return self.data[start:end]
+
+  def is_token(self, index, kind, text=None):
+    """ Returns true if the token at |index| has the specified kind and,
+      optionally, text. """
+    if index >= self.end or self.tokens[index][0] != kind:
+      return False
+    return text is None or self.text(index) == text
+
+  def skip_space(self, index, required=True):
+    """ Return the index of the first non-whitespace token at or after
+      |index|, or -1 if |required| whitespace is missing. """
+    if index < self.end and self.tokens[index][0] == 'space':
+      return index + 1
+    if required:
+      return -1
+    return index
+
+  def is_newline(self, index, indented=False):
+    """ Returns true if the token at |index| is whitespace starting with a
+      new line. If |indented| is true at least one more whitespace character
+      must follow, otherwise the new line must be the only character. """
+    if not self.is_token(index, 'space'):
+      return False
+    kind, start, end = self.tokens[index]
+    if self.data[start] != '\n':
+      return False
+    if indented:
+      return end - start > 1
+    return end - start == 1
+
+  def find_punct(self, index, char):
+    """ Return the index of the next |char| punctuation token, or -1. """
+    while index < self.end:
+      if self.tokens[index][0] == 'punct' and self.text(index) == char:
+        return index
+      index += 1
+    return -1
+
+  def match_decl(self, index, terminator, first_alpha=False):
+    """ Match a run of declaration tokens (identifiers, numbers, whitespace and
+      _decl_punct characters) ending with the |terminator| punctuation. Returns
+      the index of the terminator or -1. """
+    if first_alpha:
+      if not self.is_token(index, 'ident') or \
+          not self.data[self.tokens[index][1]].isalpha():
+        return -1
+    begin = index
+    while index < self.end:
+      kind = self.tokens[index][0]
+      if kind == 'punct':
+        char = self.text(index)
+        if char == terminator:
+          break
+        if _decl_punct.find(char) < 0:
+          return -1
+      elif kind != 'ident' and kind != 'number' and kind != 'space':
+        return -1
+      index += 1
+    if index >= self.end:
+      return -1
+    # the regexes require at least two characters before the terminator
+    if self.tokens[index][1] - self.tokens[begin][1] < 2:
+      return -1
+    return index
+
+  def match_function(self, index, with_vfmod=False):
+    """ Match 'retval name(args)' starting at |index|. Returns a tuple of
+      (retval, argval, vfmod, next index) or None. """
+    lparen = self.match_decl(index, '(', True)
+    if lparen < 0:
+      return None
+    rparen = self.find_punct(lparen + 1, ')')
+    if rparen < 0:
+      return None
+    data = self.data
+    retval = data[self.tokens[index][1]:self.tokens[lparen][1]]
+    argval = data[self.tokens[lparen][2]:self.tokens[rparen][1]]
+    index = rparen + 1
+    vfmod = ''
+    if with_vfmod:
+      while index < self.end and (self.tokens[index][0] == 'space' or \
+          self.tokens[index][0] == 'ident' or \
+          self.tokens[index][0] == 'number'):
+        index += 1
+      vfmod = data[self.tokens[rparen][2]:self.tokens[index - 1][2]].strip()
+    return (retval, argval, vfmod, index)
+
+  def match_typedef(self, index):
+    """ Match 'typedef value alias;' where |index| is the 'typedef' token.
+      Returns a tuple of (value, alias, next index) or None. """
+    value_start = self.skip_space(index + 1)
+    if value_start < 0:
+      return None
+    semicolon = self.match_decl(index + 1, ';')
+    if semicolon < 0 or semicolon == value_start:
+      return None
+    value = self.data[self.tokens[value_start][1]:self.tokens[semicolon][1]]
+    return _split_typedef(value) + (semicolon + 1,)
+
+  def match_brace_block(self, index):
+    """ Return the index of the '}' matching the '{' token at |index|, or
+      -1. """
+    depth = 0
+    while index < self.end:
+      if self.tokens[index][0] == 'punct':
+        char = self.text(index)
+        if char == '{':
+          depth += 1
+        elif char == '}':
+          depth -= 1
+          if depth == 0:
+            return index
+      index += 1
+    return -1
+
+
+def _split_typedef(value):
+  """ Split a typedef value into the value and alias components. """
+  pos = value.rfind(' ')
+  if pos < 0:
+    raise Exception('Invalid typedef: ' + value)
+  alias = value[pos + 1:].strip()
+  value = value[:pos].strip()
+  return (value, alias)
+
+
+def _scan_class(scanner, index):
+  """ Match 'class Name : public [virtual] Parent {' where |index| is the
+    'class' token. Returns a tuple of (name, parent_name, lbrace index) or
+    None. """
+  index = scanner.skip_space(index + 1)
+  if index < 0 or not scanner.is_token(index, 'ident'):
+    return None
+  name = scanner.text(index)
+  index = scanner.skip_space(index + 1)
+  if index < 0 or not scanner.is_token(index, 'punct', ':'):
+    return None
+  index = scanner.skip_space(index + 1)
+  if index < 0 or not scanner.is_token(index, 'ident', 'public'):
+    return None
+  index = scanner.skip_space(index + 1)
+  if index >= 0 and scanner.is_token(index, 'ident', 'virtual'):
+    index = scanner.skip_space(index + 1)
+  if index < 0 or not scanner.is_token(index, 'ident'):
+    return None
+  parent_name = scanner.text(index)
+  index = scanner.skip_space(index + 1)
+  if index < 0 or not scanner.is_token(index, 'punct', '{'):
+    return None
+  return (name, parent_name, index)
+
+
+def scan_header(data, with_comments=True, skeleton=False):
+  """ Extract the declarations from header file contents using a single pass
+    over the tokens. Returns the same dictionary as scan_header_regex(). If
+    |skeleton| is true the class bodies are skipped and the classes have no
+    comment and members.
+    """
+  tokens = tokenize(data)
+  scanner = _token_scanner(data, tokens)
+  # without class bodies the comments are only needed for global functions
+  comments = None
+  if with_comments and not skeleton:
+    comments = get_comment_index(data)
+
+  result = {
+      'typedefs': [],
+      'funcs': [],
+      'includes': [],
+      'forward_declares': [],
+      'classes': []
+  }
+  # the regex parser extracts empty classes before all other classes
+  empty_classes = []
+  classes = []
+
+  index = 0
+  count = len(tokens)
+  while index < count:
+    kind, start, end = tokens[index]
+    if not _is_line_start(data, start):
+      index += 1
+      continue
+
+    if kind == 'preproc':
+      text = data[start:end]
+      if text.startswith('#include "include/'):
+        pos = text.find('.h', 18)
+        if pos > 18:
+          result['includes'].append(text[18:pos])
+    elif kind == 'ident':
+      text = data[start:end]
+      if text == 'typedef':
+        typedef = scanner.match_typedef(index)
+        if not typedef is None:
+          result['typedefs'].append([typedef[0], typedef[1]])
+          index = typedef[2]
+          continue
+      elif text == 'class':
+        name = scanner.skip_space(index + 1)
+        if name >= 0 and scanner.is_token(name, 'ident') and \
+            scanner.is_token(name + 1, 'punct', ';'):
+          result['forward_declares'].append(scanner.text(name))
+          index = name + 2
+          continue
+    elif kind == 'attrib' and scanner.is_newline(index + 1):
+      attrib = data[start + 8:end - 5]
+      decl = index + 2
+      if scanner.is_token(decl, 'ident', 'class'):
+        match = _scan_class(scanner, decl)
+        if not match is None:
+          name, parent_name, lbrace = match
+          if skeleton:
+            comment = None
+          else:
+            comment = lookup_comment(data, comments, tokens[decl][1])
+          if scanner.is_token(lbrace + 1, 'punct', '}') and \
+              scanner.is_token(lbrace + 2, 'punct', ';'):
+            members = None
+            if not skeleton:
+              members = _scan_class_body(data, tokens, comments, lbrace + 1,
+                                         lbrace + 1)
+            empty_classes.append([attrib, name, parent_name, comment, members])
+            index = lbrace + 3
+            continue
+          rbrace = scanner.match_brace_block(lbrace)
+          if rbrace >= 0 and scanner.is_token(rbrace + 1, 'punct', ';'):
+            members = None
+            if not skeleton:
+              members = _scan_class_body(data, tokens, comments, lbrace + 1,
+                                         rbrace)
+            classes.append([attrib, name, parent_name, comment, members])
+            index = rbrace + 2
+            continue
+      func = scanner.match_function(decl)
+      if not func is None:
+        if with_comments and comments is None:
+          comments = get_comment_index(data)
+        comment = lookup_comment(data, comments, tokens[decl][1])
+        result['funcs'].append([attrib, func[0], func[1], comment])
+        index = func[3]
+        continue
+
+    index += 1
+
+  result['classes'] = empty_classes + classes
+  return result
+
+
+def _scan_class_body(data, tokens, comments, begin, end):
+  """ Extract the typedefs, static functions and virtual functions from the
+    class body tokens in the range [begin, end). |comments| is the
+    get_comment_index() result for |data|. Returns the same dictionary as
+    scan_class_body_regex().
+    """
+  scanner = _token_scanner(data, tokens, end)
+
+  result = {'typedefs': [], 'static_funcs': [], 'virtual_funcs': []}
+
+  index = begin
+  while index < end:
+    kind, start, stop = tokens[index]
+    if kind == 'ident' and data[start:stop] == 'typedef' and \
+        _is_indented_line_start(data, start):
+      typedef = scanner.match_typedef(index)
+      if not typedef is None:
+        result['typedefs'].append([typedef[0], typedef[1]])
+        index = typedef[2]
+        continue
+    elif kind == 'attrib' and _is_indented_line_start(data, start) and \
+        scanner.is_newline(index + 1, True):
+      decl = index + 2
+      if scanner.is_token(decl, 'ident'):
+        modifier = scanner.text(decl)
+        if modifier == 'static' or modifier == 'virtual':
+          decl = scanner.skip_space(decl + 1)
+          func = None
+          if decl >= 0:
+            func = scanner.match_function(decl, modifier == 'virtual')
+          if not func is None:
+            attrib = data[start + 8:stop - 5]
+            retval, argval, vfmod = func[0:3]
+            comment = lookup_comment(data, comments, tokens[decl][1])
+            if modifier == 'static':
+              result['static_funcs'].append([attrib, retval, argval, comment])
+            else:
+              result['virtual_funcs'].append(
+                  [attrib, retval, argval, comment, vfmod])
+            index = func[3]
+            continue
+
+    index += 1
+
+  return result
+
+
+def scan_header_regex(data, with_comments=True):
+  """ Extract the declarations from header file contents using the regex
+    parser. Returns a dictionary of 'typedefs', 'funcs', 'includes',
+    'forward_declares' and 'classes' lists. If |with_comments| is false all
+    comments are empty.
+    """
+  result = {}
+
+  # extract global typedefs
+  p = re.compile('\ntypedef' + _cre_space + _cre_typedef + ';',
+                 re.MULTILINE | re.DOTALL)
+  result['typedefs'] = [list(_split_typedef(value)) for value in p.findall(data)]
+
+  # extract global functions
+  p = re.compile('\n' + _cre_attrib + '\n' + _cre_func + r'\((.*?)\)',
+                 re.MULTILINE | re.DOTALL)
+  result['funcs'] = []
+  for attrib, retval, argval in p.findall(data):
+    comment = []
+    if with_comments:
+      comment = get_comment(data, retval + '(' + argval + ');')
+    result['funcs'].append([attrib, retval, argval, comment])
+
+  # extract includes
+  p = re.compile('\n#include \"include/' + _cre_cfnameorpath + '.h')
+  result['includes'] = p.findall(data)
+
+  # extract forward declarations
+  p = re.compile('\nclass' + _cre_space + _cre_cfname + ';')
+  result['forward_declares'] = p.findall(data)
+
+  result['classes'] = []
+
+  # extract empty classes
+  p = re.compile('\n' + _cre_attrib + '\nclass' + _cre_space + _cre_cfname +
+                 _cre_space + ':' + _cre_space + 'public' + _cre_virtual +
+                 _cre_space + _cre_cfname + _cre_space + '{};',
+                 re.MULTILINE | re.DOTALL)
+  matches = p.findall(data)
+  if len(matches) > 0:
+    for attrib, name, parent_name in matches:
+      comment = []
+      if with_comments:
+        # Style may place the ':' on the next line.
+        comment = get_comment(data, name + ' :')
+        if len(comment) == 0:
+          comment = get_comment(data, name + "\n")
+      result['classes'].append(
+          [attrib, name, parent_name, comment, scan_class_body_regex('')])
+
+    # Remove empty classes from |data| so we don't mess up the non-empty
+    # class search that follows.
+    data = p.sub('', data)
+
+  # extract classes
+  p = re.compile('\n' + _cre_attrib + '\nclass' + _cre_space + _cre_cfname +
+                 _cre_space + ':' + _cre_space + 'public' + _cre_virtual +
+                 _cre_space + _cre_cfname + _cre_space + '{(.*?)\n};',
+                 re.MULTILINE | re.DOTALL)
+  for attrib, name, parent_name, body in p.findall(data):
+    comment = []
+    if with_comments:
+      # Style may place the ':' on the next line.
+      comment = get_comment(data, name + ' :')
+      if len(comment) == 0:
+        comment = get_comment(data, name + "\n")
+    result['classes'].append([
+        attrib, name, parent_name, comment,
+        scan_class_body_regex(body, with_comments)
+    ])
+
+  return result
+
+
+def scan_class_body_regex(body, with_comments=True):
+  """ Extract the declarations from a class body using the regex parser.
+    Returns a dictionary of 'typedefs', 'static_funcs' and 'virtual_funcs'
+    lists.
+    """
+  result = {}
+
+  # extract typedefs
+  p = re.compile(
+      '\n' + _cre_space + 'typedef' + _cre_space + _cre_typedef + ';',
+      re.MULTILINE | re.DOTALL)
+  result['typedefs'] = [list(_split_typedef(value)) for value in p.findall(body)]
+
+  # extract static functions
+  p = re.compile('\n' + _cre_space + _cre_attrib + '\n' + _cre_space +
+                 'static' + _cre_space + _cre_func + r'\((.*?)\)',
+                 re.MULTILINE | re.DOTALL)
+  result['static_funcs'] = []
+  for attrib, retval, argval in p.findall(body):
+    comment = []
+    if with_comments:
+      comment = get_comment(body, retval + '(' + argval + ')')
+    result['static_funcs'].append([attrib, retval, argval, comment])
+
+  # extract virtual functions
+  p = re.compile(
+      '\n' + _cre_space + _cre_attrib + '\n' + _cre_space + 'virtual' +
+      _cre_space + _cre_func + r'\((.*?)\)' + _cre_vfmod,
+      re.MULTILINE | re.DOTALL)
+  result['virtual_funcs'] = []
+  for attrib, retval, argval, vfmod in p.findall(body):
+    comment = []
+    if with_comments:
+      comment = get_comment(body, retval + '(' + argval + ')')
+    result['virtual_funcs'].append(
+        [attrib, retval, argval, comment, vfmod.strip()])
+
+  return result
+
 # Simple translation types. Format is:
 #   'cpp_type' : ['capi_type', 'capi_default_value']
 _simpletypes = {
@@ -540,15 +1093,658 @@ def get_copyright(full=False, translator=True):
   return result.replace('$YEAR$', get_year())
 
 
+# map of platform name to the platform macros defined when building for it
+platform_macros = {
+    'windows': ('OS_WIN',),
+    'mac': ('OS_MAC', 'OS_POSIX'),
+    'linux': ('OS_LINUX', 'OS_POSIX'),
+}
+platform_names = ('windows', 'mac', 'linux')
+
+_cre_pp_directive = re.compile(
+    r'^\s*#\s*(if|ifdef|ifndef|elif|else|endif)\b(.*)$')
+_cre_pp_define = re.compile(r'^\s*#\s*define\s+(\w+)(?:[ \t]+(.*?))?\s*$')
+_cre_pp_comment = re.compile(r'//.*$|/\*.*?\*/')
+_cre_pp_token = re.compile(r'\s*(&&|\|\||!|\(|\)|\w+)')
+
+
+def get_platform_macros(platform):
+  """ Return a dictionary of the platform macros and whether they are defined
+    when building for |platform|. """
+  if not platform in platform_macros:
+    raise Exception('Unknown platform %s' % platform)
+  result = {}
+  for macros in platform_macros.values():
+    for macro in macros:
+      result[macro] = macro in platform_macros[platform]
+  return result
+
+
+def _eval_condition(expr, macros):
+  """ Evaluate a preprocessor condition. Only the macros in |macros| are
+    known; the result is None if the value depends on any other macro. """
+  tokens = []
+  expr = _cre_pp_comment.sub('', expr).strip()
+  pos = 0
+  while pos < len(expr):
+    m = _cre_pp_token.match(expr, pos)
+    if m is None:
+      return None
+    tokens.append(m.group(1))
+    pos = m.end()
+  tokens.append(None)
+  index = [0]
+
+  def peek():
+    return tokens[index[0]]
+
+  def take():
+    index[0] += 1
+    return tokens[index[0] - 1]
+
+  def combine(values, stop):
+    # three-valued logic: |stop| decides the result regardless of unknowns
+    if stop in values:
+      return stop
+    if None in values:
+      return None
+    return not stop
+
+  def parse_or():
+    values = [parse_and()]
+    while peek() == '||':
+      take()
+      values.append(parse_and())
+    return values[0] if len(values) == 1 else combine(values, True)
+
+  def parse_and():
+    values = [parse_unary()]
+    while peek() == '&&':
+      take()
+      values.append(parse_unary())
+    return values[0] if len(values) == 1 else combine(values, False)
+
+  def parse_unary():
+    token = take()
+    if token == '!':
+      value = parse_unary()
+      return None if value is None else not value
+    if token == '(':
+      value = parse_or()
+      if take() != ')':
+        raise ValueError(expr)
+      return value
+    if token == 'defined':
+      parens = peek() == '('
+      if parens:
+        take()
+      name = take()
+      if parens and take() != ')':
+        raise ValueError(expr)
+      return macros.get(name)
+    if token is None or not re.match(r'\w+$', token):
+      raise ValueError(expr)
+    if token.isdigit():
+      return int(token) != 0
+    # a macro used as a value is only known if it is undefined
+    return False if macros.get(token) is False else None
+
+  try:
+    value = parse_or()
+  except ValueError:
+    return None
+  if not peek() is None:
+    return None
+  return value
+
+
+def evaluate_conditionals(data, platform):
+  """ Remove the lines that are not compiled for |platform| from header file
+    contents. Conditions that depend on macros other than the platform macros
+    are left as they are; removed lines are replaced with empty lines. """
+  macros = get_platform_macros(platform)
+  result = []
+  # stack of [parent active, branch taken, condition unknown, active]
+  stack = []
+  active = True
+  for line in data.split('\n'):
+    m = _cre_pp_directive.match(line)
+    if m is None:
+      result.append(line if active else '')
+      continue
+
+    # directives are kept if the enclosing block is compiled
+    directive, expr = m.group(1), m.group(2)
+    keep = active
+    if directive in ('if', 'ifdef', 'ifndef'):
+      if directive == 'if':
+        value = _eval_condition(expr, macros)
+      else:
+        value = macros.get(_cre_pp_comment.sub('', expr).strip())
+        if directive == 'ifndef' and not value is None:
+          value = not value
+      if not active:
+        frame = [False, True, False, False]
+      elif value is None:
+        frame = [True, False, True, True]
+      else:
+        frame = [True, value, False, value]
+      stack.append(frame)
+    elif len(stack) == 0:
+      # unbalanced directive, keep it for the parser to ignore
+      pass
+    elif directive == 'elif':
+      frame = stack[-1]
+      keep = frame[0]
+      if frame[2]:
+        frame[3] = frame[0]
+      elif frame[1]:
+        frame[3] = False
+      else:
+        value = _eval_condition(expr, macros)
+        if value is None:
+          frame[2] = True
+          frame[3] = frame[0]
+        else:
+          frame[1] = value
+          frame[3] = value
+    elif directive == 'else':
+      frame = stack[-1]
+      keep = frame[0]
+      frame[3] = frame[0] and (frame[2] or not frame[1])
+      frame[1] = True
+    else:
+      keep = stack.pop()[0]
+
+    result.append(line if keep else '')
+    active = stack[-1][3] if len(stack) > 0 else True
+  return '\n'.join(result)
+
+
+def get_header_defines(data, platform=None):
+  """ Return a dictionary of the macro values defined by header file contents.
+    If |platform| is specified only the definitions compiled for that
+    platform are included. """
+  if not platform is None:
+    data = evaluate_conditionals(data, platform)
+  result = {}
+  for line in data.split('\n'):
+    m = _cre_pp_define.match(line)
+    if not m is None:
+      result[m.group(1)] = m.group(2) or ''
+  return result
+
+
+# Version of the declaration format returned by scan_header(). Must be
+# incremented whenever the scanners change what they extract so that header
+# models written by older versions are rejected. obj_parse_cache entries are
+# keyed by the parser source instead.
+PARSER_VERSION = 2
+
+# format and version of the files written by obj_header.write_model()
+MODEL_FORMAT = 'cef-header-model'
+MODEL_VERSION = 1
+
+
+def scan_header_data(data,
+                     legacy_parser=False,
+                     cache=None,
+                     with_comments=True,
+                     platform=None,
+                     skeleton=False):
+  """ Extract the declarations from header file contents with the token
+    scanner or, if |legacy_parser| is true, the regex parser. If |cache| is
+    specified the declarations are loaded from or stored in that
+    obj_parse_cache. Comments are only extracted if |with_comments| is true.
+    If |platform| is specified the declarations that are not compiled for
+    that platform are excluded. If |skeleton| is true the token scanner skips
+    the class bodies; the regex parser only scans them when the classes are
+    built anyway. The declarations include the 'hash' of the contents.
+    Returns a tuple of (declarations, cache hit).
+    """
+  skeleton = skeleton and not legacy_parser
+  if not cache is None:
+    key = cache.get_key(data, legacy_parser, with_comments, platform,
+                        skeleton)
+    decls = cache.load(key)
+    if not decls is None:
+      return (decls, True)
+
+  if not platform is None:
+    data = evaluate_conditionals(data, platform)
+
+  # remove space from between template definition end brackets
+  data = data.replace("> >", ">>")
+
+  if legacy_parser:
+    decls = scan_header_regex(data, with_comments)
+  else:
+    decls = scan_header(data, with_comments, skeleton)
+  decls['hash'] = get_content_hash(data)
+
+  if not cache is None:
+    cache.store(key, decls)
+  return (decls, False)
+
+
+def _read_header_declarations(args):
+  """ Read a header file and extract its declarations. Runs in the worker
+    processes started by obj_header.add_files_parallel(). """
+  filepath, legacy_parser, cache, with_comments, platform, skeleton = args
+  return scan_header_data(
+      read_file(filepath), legacy_parser, cache, with_comments, platform,
+      skeleton)
+
+
+def get_content_hash(data):
+  """ Return the SHA-1 hash of the specified file contents. """
+  return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+class obj_parse_cache:
+  """ Class representing an on-disk cache of the declarations extracted
+    from header files. Entries are keyed by a hash of the header contents,
+    the parser options and the parser source, so a header only has to be
+    parsed again after it or the parser changed. """
+
+  def __init__(self, directory):
+    self.directory = directory
+    self.parser_hash = get_content_hash(read_file(os.path.abspath(__file__)))
+    self.hits = 0
+    self.misses = 0
+
+  def get_key(self, data, legacy_parser=False, with_comments=True,
+              platform=None, skeleton=False):
+    """ Return the cache key for the specified header contents. """
+    hash = hashlib.sha1()
+    hash.update(('%s:%s:%s:' % (self.parser_hash, 'regex' if legacy_parser
+                                else 'scanner', 'comments' if with_comments
+                                else 'nocomments')).encode('utf-8'))
+    if not platform is None:
+      hash.update(('%s:' % platform).encode('utf-8'))
+    if skeleton:
+      hash.update('skeleton:'.encode('utf-8'))
+    hash.update(data.encode('utf-8'))
+    return hash.hexdigest()
+
+  def get_path(self, key):
+    """ Return the file path for the specified key. """
+    return os.path.join(self.directory, key + '.json')
+
+  def load(self, key):
+    """ Return the declarations stored for |key| or None. """
+    path = self.get_path(key)
+    if not path_exists(path):
+      return None
+    try:
+      return json.loads(read_file(path))
+    except ValueError:
+      # ignore damaged entries, they will be replaced
+      return None
+
+  def store(self, key, decls):
+    """ Store the declarations for |key|. """
+    make_dir(self.directory)
+    # write to a temporary file first so that concurrent readers never see
+    # partial entries
+    path = self.get_path(key)
+    temp_path = '%s.%d.tmp' % (path, os.getpid())
+    write_file(temp_path, json.dumps(decls, separators=(',', ':')))
+    os.replace(temp_path, path)
+
+  def count(self, hit):
+    """ Record a cache hit or miss. """
+    if hit:
+      self.hits += 1
+    else:
+      self.misses += 1
+
+
+class obj_symbol_table:
+  """ Class providing hashed lookups of the typedefs, functions and classes
+    that have been added to an obj_header. """
+
+  def __init__(self):
+    # map of class name to (position in the class list, class object)
+    self.classes = {}
+    # map of typedef alias to typedef object
+    self.typedefs = {}
+    # maps of header file name to the list of functions or classes
+    self.file_funcs = {}
+    self.file_classes = {}
+    self.class_count = 0
+
+  def add_typedef(self, typedef):
+    """ Add a global typedef. The first typedef for an alias wins. """
+    if not typedef.get_alias() in self.typedefs:
+      self.typedefs[typedef.get_alias()] = typedef
+
+  def add_func(self, func):
+    """ Add a global function. """
+    self.file_funcs.setdefault(func.get_file_name(), []).append(func)
+
+  def add_class(self, cls):
+    """ Add a class. The first class with a name wins. """
+    if not cls.get_name() in self.classes:
+      self.classes[cls.get_name()] = (self.class_count, cls)
+    self.class_count += 1
+    self.file_classes.setdefault(cls.get_file_name(), []).append(cls)
+
+  def replace_class(self, old_cls, new_cls):
+    """ Replace a class with another class of the same name and file. """
+    entry = self.classes.get(old_cls.get_name())
+    if not entry is None and entry[1] is old_cls:
+      self.classes[old_cls.get_name()] = (entry[0], new_cls)
+    file_classes = self.file_classes[old_cls.get_file_name()]
+    file_classes[file_classes.index(old_cls)] = new_cls
+
+  def get_typedef(self, alias):
+    """ Return the typedef for |alias| or None if not found. """
+    return self.typedefs.get(alias)
+
+  def get_file_funcs(self, filename):
+    """ Return the list of functions from the specified file. """
+    return list(self.file_funcs.get(filename, []))
+
+  def get_file_classes(self, filename):
+    """ Return the list of classes from the specified file. """
+    return list(self.file_classes.get(filename, []))
+
+  def get_class(self, name):
+    """ Return the class named |name| or None if not found. """
+    entry = self.classes.get(name)
+    if entry is None:
+      return None
+    return entry[1]
+
+  def get_class_position(self, name):
+    """ Return the position of the class named |name| in the list of classes
+        or None if not found. """
+    entry = self.classes.get(name)
+    if entry is None:
+      return None
+    return entry[0]
+
+
+class obj_class_hierarchy:
+  """ Class representing the inheritance hierarchy of the classes in a header.
+    The ancestors, root base class and depth of every class are computed once
+    so that queries do not have to walk the parent chains. """
+
+  def __init__(self, classes):
+    # map of class name to parent class name; the first definition wins as
+    # in obj_symbol_table
+    self.parents = {}
+    for cls in classes:
+      if not cls.get_name() in self.parents:
+        self.parents[cls.get_name()] = cls.get_parent_name()
+    # map of class name to (ancestors, ancestor set, root base class name)
+    self.entries = {}
+    # map of class name to the undefined name of its parent class
+    self.undefined_parents = {}
+    for name in self.parents.keys():
+      self.add_entries(name)
+
+  def add_entries(self, name):
+    """ Add the entries for |name| and any of its ancestors that don't have
+        entries yet. """
+    chain = []
+    current = name
+    while current in self.parents and not current in self.entries:
+      if current in chain:
+        raise Exception('Circular inheritance for class ' + current)
+      chain.append(current)
+      current = self.parents[current]
+
+    # |current| now has entries, is a base class or is undefined
+    if current in self.entries:
+      ancestors, ancestor_set, root = self.entries[current]
+      ancestors = [current] + ancestors
+    else:
+      if not is_base_class(current):
+        self.undefined_parents[chain[-1]] = current
+        root = None
+      else:
+        root = current
+      ancestors = [current]
+
+    for cls_name in reversed(chain):
+      self.entries[cls_name] = (ancestors, frozenset(ancestors), root)
+      ancestors = [cls_name] + ancestors
+
+  def get_entry(self, name, parent_name=None):
+    """ Return the entry for |name|. Classes that are not part of the
+        hierarchy, or that have a different |parent_name|, get a new entry
+        based on the entry of |parent_name|. """
+    entry = self.entries.get(name)
+    if not entry is None and \
+        (parent_name is None or self.parents[name] == parent_name):
+      return entry
+    if parent_name is None:
+      return ([], frozenset(), None)
+    parent_entry = self.entries.get(parent_name)
+    if parent_entry is None:
+      ancestors = [parent_name]
+      root = parent_name if is_base_class(parent_name) else None
+    else:
+      ancestors = [parent_name] + parent_entry[0]
+      root = parent_entry[2]
+    return (ancestors, frozenset(ancestors), root)
+
+  def get_ancestors(self, name, parent_name=None):
+    """ Return the names of all parent classes of |name| starting with the
+        direct parent and ending with the root base class. The list must not
+        be modified. """
+    return self.get_entry(name, parent_name)[0]
+
+  def has_ancestor(self, name, ancestor_name, parent_name=None):
+    """ Returns true if |ancestor_name| is a parent class of |name|. """
+    return ancestor_name in self.get_entry(name, parent_name)[1]
+
+  def get_root_base(self, name, parent_name=None):
+    """ Return the root base class name of |name| or None if the hierarchy
+        contains an undefined class. """
+    return self.get_entry(name, parent_name)[2]
+
+  def get_depth(self, name, parent_name=None):
+    """ Return the number of parent classes of |name|. """
+    return len(self.get_entry(name, parent_name)[0])
+
+  def get_undefined_parents(self):
+    """ Return a dictionary of class names whose parent class is neither
+        defined nor a base class, mapped to the parent class name. """
+    return self.undefined_parents
+
+
+class obj_type_usage_index:
+  """ Class representing a reverse index from the analyzed types of return
+    values and arguments to the functions that use them. Usages are indexed
+    by the kind of key:
+      'type'        - the C++ type, e.g. 'CefRefPtr<CefFrame>'
+      'result_type' - the analysis result type, e.g. 'refptr' or 'vector'
+      'ptr_type'    - the class referenced by a CefRefPtr or pointer
+      'vector_type' - the element type of a std::vector
+      'attrib'      - the name of a function attribute, e.g. 'count_func'
+    Each usage is a tuple of (function, argument) where the argument is None
+    for the return value and for function attributes. """
+
+  def __init__(self, funcs=[]):
+    # map of (kind, value) to the list of usages
+    self.usages = {}
+    for func in funcs:
+      self.add_function(func)
+
+  def add_usage(self, kind, value, usage):
+    """ Add a usage for the key (|kind|, |value|). """
+    self.usages.setdefault((kind, value), []).append(usage)
+
+  def add_type_usages(self, analysis, usage):
+    """ Add the keys of |analysis| for |usage|. """
+    self.add_usage('type', analysis.get_type(), usage)
+    self.add_usage('result_type', analysis.get_result_type(), usage)
+    ptr_type = analysis.get_ptr_type()
+    if not ptr_type is None:
+      self.add_usage('ptr_type', ptr_type, usage)
+    vector_type = analysis.get_vector_type()
+    if not vector_type is None:
+      self.add_usage('vector_type', vector_type, usage)
+
+  def add_function(self, func):
+    """ Add the return value, arguments and attributes of |func|. """
+    self.add_type_usages(func.get_retval().get_type(), (func, None))
+    for arg in func.get_arguments():
+      self.add_type_usages(arg.get_type(), (func, arg))
+    for name in func.get_attribs().keys():
+      self.add_usage('attrib', name, (func, None))
+
+  def add_class(self, cls):
+    """ Add the static and virtual functions of |cls|. """
+    for func in cls.get_static_funcs() + cls.get_virtual_funcs():
+      self.add_function(func)
+
+  def get_usages(self, kind, value):
+    """ Return the list of (function, argument) usages of the key. """
+    return self.usages.get((kind, value), [])
+
+  def get_functions(self, kind, value):
+    """ Return the list of functions that use the key. """
+    result = []
+    for func, arg in self.get_usages(kind, value):
+      if len(result) == 0 or not result[-1] is func:
+        result.append(func)
+    return result
+
+  def get_values(self, kind):
+    """ Return the sorted list of indexed values of |kind|. """
+    return sorted([key[1] for key in self.usages.keys() if key[0] == kind])
+
+  def get_counts(self, kind):
+    """ Return a dictionary mapping the indexed values of |kind| to the
+        number of usages. """
+    result = {}
+    for key, usages in self.usages.items():
+      if key[0] == kind:
+        result[key[1]] = len(usages)
+    return result
+
+  def get_table(self):
+    """ Return a dictionary mapping each kind to a dictionary of values and
+        the usage names. Usages are named 'Class::Function()' for return
+        values and attributes and 'Class::Function(name)' for arguments. The
+        dictionary only contains strings so it can be exported as JSON. """
+    result = {}
+    for (kind, value), usages in self.usages.items():
+      names = []
+      for func, arg in usages:
+        names.append('%s(%s)' % (func.get_qualified_name(),
+                                 '' if arg is None else arg.get_name()))
+      result.setdefault(kind, {})[value] = names
+    return result
+
+
+class obj_analysis_cache:
+  """ Class representing a cache of obj_analysis results. Results are keyed by
+    the normalized type and, if the type was resolved through a typedef
+    alias, by the scope list it was resolved in. Most types (strings,
+    simple types, pointers, structures and containers) do not depend on the
+    scope and are shared by all classes. Unnamed results are shared and must
+    not be modified; named results are copies with the name set. """
+
+  def __init__(self):
+    self.analyses = {}
+    # map of scope list tuple to the analyses resolved in that scope
+    self.scoped_analyses = {}
+    self.hits = 0
+    self.misses = 0
+
+  def get(self, scopelist, value, named=True):
+    """ Return the analysis of |value| in the context of |scopelist|. """
+    partlist = value.split()
+    if named:
+      if len(partlist) < 2:
+        raise Exception('Invalid argument value: ' + value)
+      # the type is analyzed without the name
+      return self.get(scopelist, ' '.join(partlist[:-1]),
+                      False).get_named(partlist[-1])
+
+    value = ' '.join(partlist)
+    result = self.analyses.get(value)
+    if result is None:
+      scoped = self.scoped_analyses.get(tuple(scopelist))
+      if not scoped is None:
+        result = scoped.get(value)
+      if result is None:
+        self.misses += 1
+        result = obj_analysis(scopelist, value, False)
+        if result.scoped:
+          self.scoped_analyses.setdefault(tuple(scopelist), {})[value] = result
+        else:
+          self.analyses[value] = result
+        return result
+    self.hits += 1
+    return result
+
+  def release_scopes(self, classes):
+    """ Remove the analyses resolved in the scope of any of |classes|. """
+    for scope in list(self.scoped_analyses.keys()):
+      if scope[0] in classes:
+        del self.scoped_analyses[scope]
+
+  def get_hit_rate(self):
+    """ Return the fraction of lookups that were answered from the cache. """
+    total = self.hits + self.misses
+    if total == 0:
+      return 0.0
+    return float(self.hits) / total
+
+
 class obj_header:
   """ Class representing a C++ header file. """
 
-  def __init__(self):
+  def __init__(self,
+               legacy_parser=False,
+               with_comments=True,
+               streaming=False,
+               platform=None,
+               keep_declarations=False):
     self.filenames = []
     self.typedefs = []
     self.funcs = []
     self.classes = []
+    self.file_hashes = {}
+    self.symbols = obj_symbol_table()
+    self.analyses = obj_analysis_cache()
+    # created on first use by get_class_hierarchy()
+    self.class_hierarchy = None
+    # created on first use by get_type_usage_index()
+    self.type_usage_index = None
     self.root_directory = None
+    # use the regex parser instead of the token scanner
+    self.legacy_parser = legacy_parser
+    # extract and validate the class and function comments. Comments are only
+    # needed for documentation, so parsing is faster without them.
+    self.with_comments = with_comments
+    # optional obj_parse_cache for the extracted declarations
+    self.parse_cache = None
+    # platform that the declarations are compiled for or None for all
+    self.platform = platform
+    # in streaming mode classes are added without members until they are
+    # loaded by iter_file_classes()
+    self.streaming = streaming
+    # map of header file name to file path
+    self.file_paths = {}
+    # map of class object to position in the class list
+    self.class_positions = {}
+    # names of the files whose declarations were added, in order
+    self.declared_files = []
+    # retain the declarations added for each file for export_model(); otherwise
+    # they are scanned again when needed
+    self.keep_declarations = keep_declarations
+    # map of file name to the declarations that were added, if retained
+    self.file_decls = {}
+    # map of file name to the contents of files that are not parsed but are
+    # needed to generate output, e.g. cef_version.h
+    self.attached_files = {}
 
   def set_root_directory(self, root_directory):
     """ Set the root directory. """
@@ -558,118 +1754,262 @@ class obj_header:
     """ Get the root directory. """
     return self.root_directory
 
-  def add_directory(self, directory, excluded_files=[]):
-    """ Add all header files from the specified directory. """
-    files = get_files(os.path.join(directory, '*.h'))
-    for file in files:
+  def set_parse_cache(self, parse_cache):
+    """ Set the obj_parse_cache used when adding header files. """
+    self.parse_cache = parse_cache
+
+  def get_parse_cache(self):
+    """ Get the obj_parse_cache used when adding header files. """
+    return self.parse_cache
+
+  def add_directory(self, directory, excluded_files=[], jobs=1):
+    """ Add all header files from the specified directory. If |jobs| is
+        greater than 1 the files are read and scanned by that many worker
+        processes and then added in sorted file order. """
+    files = []
+    for file in get_files(os.path.join(directory, '*.h')):
       if len(excluded_files) == 0 or \
           not os.path.split(file)[1] in excluded_files:
-        self.add_file(file)
+        files.append(file)
 
-  def add_file(self, filepath):
-    """ Add a header file. """
+    if jobs > 1 and len(files) > 1:
+      self.add_files_parallel(files, jobs)
+    else:
+      for file in files:
+        self.add_file(file)
 
+  def add_files_parallel(self, filepaths, jobs):
+    """ Add header files by scanning them in a pool of |jobs| worker
+        processes. Scanning is independent per file; the objects are built
+        afterwards in the order of |filepaths| so that typedef resolution and
+        the resulting model are identical to adding the files one by one. """
+    import multiprocessing
+    pool = multiprocessing.Pool(min(jobs, len(filepaths)))
+    try:
+      results = pool.map(_read_header_declarations,
+                         [(filepath, self.legacy_parser, self.parse_cache,
+                           self.with_comments, self.platform, self.streaming)
+                          for filepath in filepaths])
+    finally:
+      pool.close()
+      pool.join()
+
+    for filepath, (decls, hit) in zip(filepaths, results):
+      if not self.parse_cache is None:
+        self.parse_cache.count(hit)
+      filename = self.get_file_name(filepath)
+      self.file_paths[filename] = filepath
+      self.add_declarations(filename, decls)
+
+  def get_file_name(self, filepath):
+    """ Return the header file name for |filepath| relative to the root
+        directory, if any. """
     if self.root_directory is None:
       filename = os.path.split(filepath)[1]
     else:
       filename = os.path.relpath(filepath, self.root_directory)
       filename = filename.replace('\\', '/')
+    return filename
+
+  def add_file(self, filepath):
+    """ Add a header file. """
 
     # read the input file into memory
+    filename = self.get_file_name(filepath)
+    self.file_paths[filename] = filepath
     self.add_data(filename, read_file(filepath))
 
   def add_data(self, filename, data):
     """ Add header file contents. """
-
-    added = False
-
-    # remove space from between template definition end brackets
-    data = data.replace("> >", ">>")
-
-    # extract global typedefs
-    p = re.compile('\ntypedef' + _cre_space + _cre_typedef + ';',
-                   re.MULTILINE | re.DOTALL)
-    list = p.findall(data)
-    if len(list) > 0:
-      # build the global typedef objects
-      for value in list:
-        pos = value.rfind(' ')
-        if pos < 0:
-          raise Exception('Invalid typedef: ' + value)
-        alias = value[pos + 1:].strip()
-        value = value[:pos].strip()
-        self.typedefs.append(obj_typedef(self, filename, value, alias))
-
-    # extract global functions
-    p = re.compile('\n' + _cre_attrib + '\n' + _cre_func + r'\((.*?)\)',
-                   re.MULTILINE | re.DOTALL)
-    list = p.findall(data)
-    if len(list) > 0:
-      added = True
-
-      # build the global function objects
-      for attrib, retval, argval in list:
-        comment = get_comment(data, retval + '(' + argval + ');')
+    self.add_declarations(filename, self.scan_data(data, self.streaming))
+
+  def scan_data(self, data, skeleton=False):
+    """ Return the declarations extracted from header file contents. If
+        |skeleton| is true the class members may be omitted. """
+    decls, hit = scan_header_data(data, self.legacy_parser, self.parse_cache,
+                                  self.with_comments, self.platform, skeleton)
+    if not self.parse_cache is None:
+      self.parse_cache.count(hit)
+    return decls
+
+  def add_declarations(self, filename, decls):
+    """ Add the declarations extracted from a header file by scan_header()
+        or scan_header_regex(). """
+
+    if 'hash' in decls:
+      self.file_hashes[filename] = decls['hash']
+    self.declared_files.append(filename)
+    if self.keep_declarations and not self.streaming:
+      # retained for export_model()
+      self.file_decls[filename] = decls
+
+    # the hierarchy and the type usages include the new functions and classes
+    self.class_hierarchy = None
+    self.type_usage_index = None
+
+    # build the global typedef objects
+    for value, alias in decls['typedefs']:
+      typedef = obj_typedef(self, filename, value, alias)
+      self.typedefs.append(typedef)
+      self.symbols.add_typedef(typedef)
+
+    # build the global function objects
+    for attrib, retval, argval, comment in decls['funcs']:
+      if self.with_comments:
         validate_comment(filename, retval, comment)
-        self.funcs.append(
-            obj_function(self, filename, attrib, retval, argval, comment))
-
-    # extract includes
-    p = re.compile('\n#include \"include/' + _cre_cfnameorpath + '.h')
-    includes = p.findall(data)
-
-    # extract forward declarations
-    p = re.compile('\nclass' + _cre_space + _cre_cfname + ';')
-    forward_declares = p.findall(data)
-
-    # extract empty classes
-    p = re.compile('\n' + _cre_attrib + '\nclass' + _cre_space + _cre_cfname +
-                   _cre_space + ':' + _cre_space + 'public' + _cre_virtual +
-                   _cre_space + _cre_cfname + _cre_space + '{};',
-                   re.MULTILINE | re.DOTALL)
-    list = p.findall(data)
-    if len(list) > 0:
-      added = True
-
-      # build the class objects
-      for attrib, name, parent_name in list:
-        # Style may place the ':' on the next line.
-        comment = get_comment(data, name + ' :')
-        if len(comment) == 0:
-          comment = get_comment(data, name + "\n")
-        validate_comment(filename, name, comment)
-        self.classes.append(
-            obj_class(self, filename, attrib, name, parent_name, "", comment,
-                      includes, forward_declares))
-
-      # Remove empty classes from |data| so we don't mess up the non-empty
-      # class search that follows.
-      data = p.sub('', data)
-
-    # extract classes
-    p = re.compile('\n' + _cre_attrib + '\nclass' + _cre_space + _cre_cfname +
-                   _cre_space + ':' + _cre_space + 'public' + _cre_virtual +
-                   _cre_space + _cre_cfname + _cre_space + '{(.*?)\n};',
-                   re.MULTILINE | re.DOTALL)
-    list = p.findall(data)
-    if len(list) > 0:
-      added = True
-
-      # build the class objects
-      for attrib, name, parent_name, body in list:
-        # Style may place the ':' on the next line.
-        comment = get_comment(data, name + ' :')
-        if len(comment) == 0:
-          comment = get_comment(data, name + "\n")
-        validate_comment(filename, name, comment)
-        self.classes.append(
-            obj_class(self, filename, attrib, name, parent_name, body, comment,
-                      includes, forward_declares))
-
-    if added:
+      func = obj_function(self, filename, attrib, retval, argval, comment)
+      self.funcs.append(func)
+      self.symbols.add_func(func)
+
+    includes = decls['includes']
+    forward_declares = decls['forward_declares']
+
+    # build the class objects
+    for attrib, name, parent_name, comment, members in decls['classes']:
+      if self.streaming:
+        # only the name and the parent are needed until the members are
+        # loaded by iter_file_classes()
+        cls = obj_class(self, filename, attrib, name, parent_name,
+                        _empty_class_members, [], includes, forward_declares)
+      else:
+        if self.with_comments:
+          validate_comment(filename, name, comment)
+        cls = obj_class(self, filename, attrib, name, parent_name, members,
+                        comment, includes, forward_declares)
+      self.class_positions[cls] = len(self.classes)
+      self.classes.append(cls)
+      self.symbols.add_class(cls)
+
+    if len(decls['funcs']) > 0 or len(decls['classes']) > 0:
       # a global function or class was read from the header file
       self.filenames.append(filename)
 
+  def get_file_declarations(self, filename):
+    """ Return the declarations that were added for the specified file. In
+        streaming mode the file is scanned again. """
+    if filename in self.file_decls:
+      return self.file_decls[filename]
+    if not filename in self.file_paths:
+      raise Exception('The path of header file %s is not known' % filename)
+    return self.scan_data(read_file(self.file_paths[filename]))
+
+  def attach_file(self, filepath):
+    """ Attach the contents of a file that is not parsed. """
+    self.attached_files[os.path.split(filepath)[1]] = read_file(filepath)
+
+  def get_attached_file(self, name):
+    """ Return the contents of an attached file or None if not attached. """
+    return self.attached_files.get(name)
+
+  def export_model(self):
+    """ Return the model as a dictionary that only contains JSON types. The
+        'files' are the declarations that read_model() builds the model from;
+        the 'model' describes the analyzed classes and functions for other
+        tools and is not read back. """
+    model = {'typedefs': [], 'funcs': [], 'classes': []}
+    for typedef in self.typedefs:
+      model['typedefs'].append(_export_typedef(typedef))
+    for func in self.funcs:
+      model['funcs'].append(_export_function(func))
+    for classes in self.iter_file_classes():
+      for cls in classes:
+        model['classes'].append({
+            'name': cls.get_name(),
+            'parent': cls.get_parent_name(),
+            'file': cls.get_file_name(),
+            'capi_name': cls.get_capi_name(),
+            'attribs': dict(cls.get_attribs()),
+            'typedefs': [_export_typedef(t) for t in cls.get_typedefs()],
+            'static_funcs':
+                [_export_function(f) for f in cls.get_static_funcs()],
+            'virtual_funcs':
+                [_export_function(f) for f in cls.get_virtual_funcs()],
+        })
+
+    files = []
+    for filename in self.declared_files:
+      files.append({
+          'name': filename,
+          'declarations': self.get_file_declarations(filename)
+      })
+
+    return {
+        'format': MODEL_FORMAT,
+        'version': MODEL_VERSION,
+        'parser_version': PARSER_VERSION,
+        'legacy_parser': self.legacy_parser,
+        'with_comments': self.with_comments,
+        'platform': self.platform,
+        'root_directory': self.root_directory,
+        'files': files,
+        'attached_files': self.attached_files,
+        'model': model,
+    }
+
+  def write_model(self, filepath):
+    """ Write the export_model() result to a JSON file. """
+    write_file(filepath, json.dumps(self.export_model(),
+                                    separators=(',', ':'), sort_keys=True))
+
+  def replace_class(self, old_cls, new_cls):
+    """ Replace a class with another class of the same name and file. """
+    pos = self.class_positions.pop(old_cls)
+    self.classes[pos] = new_cls
+    self.class_positions[new_cls] = pos
+    self.symbols.replace_class(old_cls, new_cls)
+
+  def load_file_classes(self, filename):
+    """ Replace the classes from the specified file, which were added without
+        members in streaming mode, with complete classes. Returns the list of
+        (added class, complete class) pairs for release_file_classes(). """
+    decls = self.get_file_declarations(filename)
+    includes = decls['includes']
+    forward_declares = decls['forward_declares']
+    result = []
+    for skeleton, (attrib, name, parent_name, comment, members) in \
+        zip(self.get_classes(filename), decls['classes']):
+      if self.with_comments:
+        validate_comment(filename, name, comment)
+      cls = obj_class(self, filename, attrib, name, parent_name, members,
+                      comment, includes, forward_declares)
+      self.replace_class(skeleton, cls)
+      result.append((skeleton, cls))
+    return result
+
+  def release_file_classes(self, loaded):
+    """ Restore the classes replaced by load_file_classes() so that the
+        complete classes can be freed. """
+    for skeleton, cls in loaded:
+      self.replace_class(cls, skeleton)
+    self.analyses.release_scopes(set([cls for skeleton, cls in loaded]))
+
+  def iter_file_classes(self):
+    """ Yield the list of classes from each header file. In streaming mode
+        the complete classes of the file, and of the files that define their
+        parent classes, only exist until the next list is requested. """
+    for filename in self.filenames:
+      classes = self.get_classes(filename)
+      if not self.streaming or len(classes) == 0:
+        yield classes
+        continue
+
+      # load the file and the files that define parent classes
+      filenames = [filename]
+      for cls in classes:
+        for name in cls.get_ancestors():
+          parent_cls = self.get_class(name)
+          if not parent_cls is None and \
+              not parent_cls.get_file_name() in filenames:
+            filenames.append(parent_cls.get_file_name())
+      loaded = []
+      for name in filenames:
+        loaded.append(self.load_file_classes(name))
+      try:
+        yield self.get_classes(filename)
+      finally:
+        for pairs in loaded:
+          self.release_file_classes(pairs)
+
   def __repr__(self):
     result = ''
 
@@ -697,6 +2037,11 @@ class obj_header:
     """ Return the array of header file names. """
     return self.filenames
 
+  def get_file_hash(self, filename):
+    """ Return the content hash of the specified header file or None if
+        unknown. """
+    return self.file_hashes.get(filename)
+
   def get_typedefs(self):
     """ Return the array of typedef objects. """
     return self.typedefs
@@ -707,11 +2052,7 @@ class obj_header:
       return self.funcs
     else:
       # only return the functions in the specified file
-      res = []
-      for func in self.funcs:
-        if func.get_file_name() == filename:
-          res.append(func)
-      return res
+      return self.symbols.get_file_funcs(filename)
 
   def get_classes(self, filename=None):
     """ Return the array of class objects. """
@@ -719,20 +2060,18 @@ class obj_header:
       return self.classes
     else:
       # only return the classes in the specified file
-      res = []
-      for cls in self.classes:
-        if cls.get_file_name() == filename:
-          res.append(cls)
-      return res
+      return self.symbols.get_file_classes(filename)
 
   def get_class(self, classname, defined_structs=None):
     """ Return the specified class or None if not found. """
-    for cls in self.classes:
-      if cls.get_name() == classname:
-        return cls
-      elif not defined_structs is None:
+    if not defined_structs is None:
+      # all classes preceding the specified class are already defined
+      pos = self.symbols.get_class_position(classname)
+      if pos is None:
+        pos = len(self.classes)
+      for cls in self.classes[:pos]:
         defined_structs.append(cls.get_capi_name())
-    return None
+    return self.symbols.get_class(classname)
 
   def get_class_names(self):
     """ Returns the names of all classes in this object. """
@@ -741,19 +2080,26 @@ class obj_header:
       result.append(cls.get_name())
     return result
 
+  def get_class_hierarchy(self):
+    """ Return the obj_class_hierarchy of all classes. """
+    if self.class_hierarchy is None:
+      self.class_hierarchy = obj_class_hierarchy(self.classes)
+    return self.class_hierarchy
+
   def get_base_class_name(self, classname):
     """ Returns the base (root) class name for |classname|. """
-    cur_cls = self.get_class(classname)
-    while True:
-      parent_name = cur_cls.get_parent_name()
-      if is_base_class(parent_name):
-        return parent_name
-      else:
-        parent_cls = self.get_class(parent_name)
-        if parent_cls is None:
-          break
-      cur_cls = self.get_class(parent_name)
-    return None
+    return self.get_class_hierarchy().get_root_base(classname)
+
+  def get_type_usage_index(self):
+    """ Return the obj_type_usage_index of all global and class functions.
+        In streaming mode the classes have no functions until they are loaded
+        by iter_file_classes(). """
+    if self.type_usage_index is None:
+      index = obj_type_usage_index(self.funcs)
+      for cls in self.classes:
+        index.add_class(cls)
+      self.type_usage_index = index
+    return self.type_usage_index
 
   def get_types(self, list):
     """ Return a dictionary mapping data types to analyzed values. """
@@ -766,14 +2112,18 @@ class obj_header:
   def get_alias_translation(self, alias):
     """ Return a translation of alias to value based on typedef
             statements. """
-    for cls in self.typedefs:
-      if cls.alias == alias:
-        return cls.value
-    return None
+    typedef = self.symbols.get_typedef(alias)
+    if typedef is None:
+      return None
+    return typedef.value
 
   def get_analysis(self, value, named=True):
     """ Return an analysis of the value based the header file context. """
-    return obj_analysis([self], value, named)
+    return self.analyses.get([self], value, named)
+
+  def get_analysis_cache(self):
+    """ Return the obj_analysis_cache shared by the header and its classes. """
+    return self.analyses
 
   def get_defined_structs(self):
     """ Return a list of already defined structure names. """
@@ -817,72 +2167,138 @@ class obj_header:
     return map
 
 
+def _export_analysis(analysis):
+  """ Return the JSON description of an obj_analysis. """
+  result = {
+      'type': analysis.get_type(),
+      'result_type': analysis.get_result_type(),
+      'const': analysis.is_const(),
+      'byref': analysis.is_byref(),
+      'byaddr': analysis.is_byaddr(),
+  }
+  # unnamed vectors and maps, e.g. typedef values, have no C API
+  # representation
+  if analysis.has_name() or \
+      not (analysis.is_result_vector() or analysis.is_result_map()):
+    result['capi'] = analysis.get_capi()
+  if analysis.has_name():
+    result['name'] = analysis.get_name()
+  if not analysis.get_ptr_type() is None:
+    result['ptr_type'] = analysis.get_ptr_type()
+  if not analysis.get_vector_type() is None:
+    result['vector_type'] = analysis.get_vector_type()
+  return result
+
+
+def _export_typedef(typedef):
+  """ Return the JSON description of an obj_typedef. """
+  return {
+      'alias': typedef.get_alias(),
+      'value': _export_analysis(typedef.get_value())
+  }
+
+
+def _export_function(func):
+  """ Return the JSON description of an obj_function. """
+  result = {
+      'name': func.get_name(),
+      'capi_name': func.get_capi_name(),
+      'attribs': dict(func.get_attribs()),
+      'retval': _export_analysis(func.get_retval().get_type()),
+      'args': [_export_analysis(arg.get_type()) for arg in func.get_arguments()],
+      'capi_parts': func.get_capi_parts(),
+  }
+  if isinstance(func, obj_function_virtual):
+    result['const'] = func.is_const()
+  return result
+
+
+def read_model(filepath, streaming=False):
+  """ Return the obj_header built from a file written by
+    obj_header.write_model(). The declarations are retained because the
+    header files cannot be scanned again, so the model can be written again.
+    In streaming mode the classes are built when they are loaded. """
+  model = json.loads(read_file(filepath))
+  if model.get('format') != MODEL_FORMAT:
+    raise Exception('File %s is not a header model' % filepath)
+  if model.get('version') != MODEL_VERSION or \
+      model.get('parser_version') != PARSER_VERSION:
+    raise Exception('Header model %s has an unsupported version' % filepath)
+
+  header = obj_header(model['legacy_parser'], model['with_comments'],
+                      streaming, model['platform'])
+  header.set_root_directory(model['root_directory'])
+  header.attached_files = model['attached_files']
+  for entry in model['files']:
+    header.add_declarations(entry['name'], entry['declarations'])
+    header.file_decls[entry['name']] = entry['declarations']
+  return header
+
+
+# class members of the classes added in streaming mode
+_empty_class_members = {'typedefs': [], 'static_funcs': [], 'virtual_funcs': []}
+
+
 class obj_class:
   """ Class representing a C++ class. """
 
+  __slots__ = ('parent', 'filename', 'attrib', 'attribs', 'name', 'parent_name',
+               'comment', 'includes', 'forward_declares', 'typedefs',
+               'staticfuncs', 'virtualfuncs')
+
   def __init__(self, parent, filename, attrib, name, parent_name, body, comment,
                includes, forward_declares):
     if not isinstance(parent, obj_header):
       raise Exception('Invalid parent object type')
 
     self.parent = parent
-    self.filename = filename
-    self.attribs = str_to_dict(attrib)
-    self.name = name
-    self.parent_name = parent_name
+    self.filename = sys.intern(filename)
+    # the attribute dictionary is created on first use
+    self.attrib = attrib
+    self.attribs = None
+    self.name = sys.intern(name)
+    self.parent_name = sys.intern(parent_name)
     self.comment = comment
     self.includes = includes
     self.forward_declares = forward_declares
 
-    # extract typedefs
-    p = re.compile(
-        '\n' + _cre_space + 'typedef' + _cre_space + _cre_typedef + ';',
-        re.MULTILINE | re.DOTALL)
-    list = p.findall(body)
+    # |body| is either the class body text or the dictionary returned by
+    # scan_class_body_regex() for it
+    if not isinstance(body, dict):
+      if parent.legacy_parser:
+        body = scan_class_body_regex(body, parent.with_comments)
+      else:
+        body = '{' + body + '}'
+        tokens = tokenize(body)
+        comments = None
+        if parent.with_comments:
+          comments = get_comment_index(body)
+        body = _scan_class_body(body, tokens, comments, 1, len(tokens) - 1)
 
     # build the typedef objects
     self.typedefs = []
-    for value in list:
-      pos = value.rfind(' ')
-      if pos < 0:
-        raise Exception('Invalid typedef: ' + value)
-      alias = value[pos + 1:].strip()
-      value = value[:pos].strip()
+    for value, alias in body['typedefs']:
       self.typedefs.append(obj_typedef(self, filename, value, alias))
 
-    # extract static functions
-    p = re.compile('\n' + _cre_space + _cre_attrib + '\n' + _cre_space +
-                   'static' + _cre_space + _cre_func + r'\((.*?)\)',
-                   re.MULTILINE | re.DOTALL)
-    list = p.findall(body)
-
     # build the static function objects
     self.staticfuncs = []
-    for attrib, retval, argval in list:
-      comment = get_comment(body, retval + '(' + argval + ')')
-      validate_comment(filename, retval, comment)
+    for attrib, retval, argval, comment in body['static_funcs']:
+      if parent.with_comments:
+        validate_comment(filename, retval, comment)
       self.staticfuncs.append(
           obj_function_static(self, attrib, retval, argval, comment))
 
-    # extract virtual functions
-    p = re.compile(
-        '\n' + _cre_space + _cre_attrib + '\n' + _cre_space + 'virtual' +
-        _cre_space + _cre_func + r'\((.*?)\)' + _cre_vfmod,
-        re.MULTILINE | re.DOTALL)
-    list = p.findall(body)
-
     # build the virtual function objects
     self.virtualfuncs = []
-    for attrib, retval, argval, vfmod in list:
-      comment = get_comment(body, retval + '(' + argval + ')')
-      validate_comment(filename, retval, comment)
+    for attrib, retval, argval, comment, vfmod in body['virtual_funcs']:
+      if parent.with_comments:
+        validate_comment(filename, retval, comment)
       self.virtualfuncs.append(
-          obj_function_virtual(self, attrib, retval, argval, comment,
-                               vfmod.strip()))
+          obj_function_virtual(self, attrib, retval, argval, comment, vfmod))
 
   def __repr__(self):
     result = '/* ' + dict_to_str(
-        self.attribs) + ' */ class ' + self.name + "\n{"
+        self.get_attribs()) + ' */ class ' + self.name + "\n{"
 
     if len(self.typedefs) > 0:
       result += "\n\t"
@@ -945,21 +2361,27 @@ class obj_class:
     """ Returns true if this class has the specified class anywhere in its
             inheritance hierarchy. """
     # Every class has a known base class as the top-most parent.
-    if is_base_class(parent_name) or parent_name == self.parent_name:
+    if is_base_class(parent_name):
       return True
-    if is_base_class(self.parent_name):
-      return False
-
-    cur_cls = self.parent.get_class(self.parent_name)
-    while True:
-      cur_parent_name = cur_cls.get_parent_name()
-      if is_base_class(cur_parent_name):
-        break
-      elif cur_parent_name == parent_name:
-        return True
-      cur_cls = self.parent.get_class(cur_parent_name)
-
-    return False
+    return self.parent.get_class_hierarchy().has_ancestor(
+        self.name, parent_name, self.parent_name)
+
+  def get_ancestors(self):
+    """ Return the names of all parent classes starting with the direct
+            parent and ending with the root base class. """
+    return self.parent.get_class_hierarchy().get_ancestors(
+        self.name, self.parent_name)
+
+  def get_base_class_name(self):
+    """ Return the base (root) class name or None if a parent class is not
+            defined. """
+    return self.parent.get_class_hierarchy().get_root_base(
+        self.name, self.parent_name)
+
+  def get_depth(self):
+    """ Return the number of parent classes. """
+    return self.parent.get_class_hierarchy().get_depth(
+        self.name, self.parent_name)
 
   def get_comment(self):
     """ Return the class comment as an array of lines. """
@@ -977,32 +2399,36 @@ class obj_class:
 
   def get_attribs(self):
     """ Return all attributes as a dictionary. """
+    if self.attribs is None:
+      self.attribs = get_attrib_dict(self.attrib)
     return self.attribs
 
   def has_attrib(self, name):
     """ Return true if the specified attribute exists. """
-    return name in self.attribs
+    return name in self.get_attribs()
 
   def get_attrib(self, name):
     """ Return the first or only value for specified attribute. """
-    if name in self.attribs:
-      if isinstance(self.attribs[name], list):
+    attribs = self.get_attribs()
+    if name in attribs:
+      if isinstance(attribs[name], tuple):
         # the value is a list
-        return self.attribs[name][0]
+        return attribs[name][0]
       else:
         # the value is a string
-        return self.attribs[name]
+        return attribs[name]
     return None
 
   def get_attrib_list(self, name):
     """ Return all values for specified attribute as a list. """
-    if name in self.attribs:
-      if isinstance(self.attribs[name], list):
+    attribs = self.get_attribs()
+    if name in attribs:
+      if isinstance(attribs[name], tuple):
         # the value is already a list
-        return self.attribs[name]
+        return list(attribs[name])
       else:
         # convert the value to a list
-        return [self.attribs[name]]
+        return [attribs[name]]
     return None
 
   def get_typedefs(self):
@@ -1046,28 +2472,30 @@ class obj_class:
     """ Return an analysis of the value based on the class definition
         context.
         """
-    return obj_analysis([self, self.parent], value, named)
+    return self.parent.analyses.get([self, self.parent], value, named)
 
   def is_library_side(self):
     """ Returns true if the class is implemented by the library. """
-    return self.attribs['source'] == 'library'
+    return self.get_attribs()['source'] == 'library'
 
   def is_client_side(self):
     """ Returns true if the class is implemented by the client. """
-    return self.attribs['source'] == 'client'
+    return self.get_attribs()['source'] == 'client'
 
 
 class obj_typedef:
   """ Class representing a typedef statement. """
 
+  __slots__ = ('parent', 'filename', 'alias', 'value')
+
   def __init__(self, parent, filename, value, alias):
     if not isinstance(parent, obj_header) \
         and not isinstance(parent, obj_class):
       raise Exception('Invalid parent object type')
 
     self.parent = parent
-    self.filename = filename
-    self.alias = alias
+    self.filename = sys.intern(filename)
+    self.alias = sys.intern(alias)
     self.value = self.parent.get_analysis(value, False)
 
   def __repr__(self):
@@ -1101,10 +2529,15 @@ class obj_typedef:
 class obj_function:
   """ Class representing a function. """
 
+  __slots__ = ('parent', 'filename', 'attrib', 'attribs', 'retval', 'name',
+               'comment', 'arguments')
+
   def __init__(self, parent, filename, attrib, retval, argval, comment):
     self.parent = parent
-    self.filename = filename
-    self.attribs = str_to_dict(attrib)
+    self.filename = sys.intern(filename)
+    # the attribute dictionary is created on first use
+    self.attrib = attrib
+    self.attribs = None
     self.retval = obj_argument(self, retval)
     self.name = self.retval.remove_name()
     self.comment = comment
@@ -1139,7 +2572,7 @@ class obj_function:
                       self.get_qualified_name())
 
   def __repr__(self):
-    return '/* ' + dict_to_str(self.attribs) + ' */ ' + self.get_cpp_proto()
+    return '/* ' + dict_to_str(self.get_attribs()) + ' */ ' + self.get_cpp_proto()
 
   def get_file_name(self):
     """ Return the C++ header file name. """
@@ -1164,8 +2597,9 @@ class obj_function:
 
   def get_capi_name(self, prefix=None):
     """ Return the CAPI function name. """
-    if 'capi_name' in self.attribs:
-      return self.attribs['capi_name']
+    attribs = self.get_attribs()
+    if 'capi_name' in attribs:
+      return attribs['capi_name']
     return get_capi_name(self.name, False, prefix)
 
   def get_comment(self):
@@ -1174,32 +2608,36 @@ class obj_function:
 
   def get_attribs(self):
     """ Return all attributes as a dictionary. """
+    if self.attribs is None:
+      self.attribs = get_attrib_dict(self.attrib)
     return self.attribs
 
   def has_attrib(self, name):
     """ Return true if the specified attribute exists. """
-    return name in self.attribs
+    return name in self.get_attribs()
 
   def get_attrib(self, name):
     """ Return the first or only value for specified attribute. """
-    if name in self.attribs:
-      if isinstance(self.attribs[name], list):
+    attribs = self.get_attribs()
+    if name in attribs:
+      if isinstance(attribs[name], tuple):
         # the value is a list
-        return self.attribs[name][0]
+        return attribs[name][0]
       else:
         # the value is a string
-        return self.attribs[name]
+        return attribs[name]
     return None
 
   def get_attrib_list(self, name):
     """ Return all values for specified attribute as a list. """
-    if name in self.attribs:
-      if isinstance(self.attribs[name], list):
+    attribs = self.get_attribs()
+    if name in attribs:
+      if isinstance(attribs[name], tuple):
         # the value is already a list
-        return self.attribs[name]
+        return list(attribs[name])
       else:
         # convert the value to a list
-        return [self.attribs[name]]
+        return [attribs[name]]
     return None
 
   def get_retval(self):
@@ -1318,6 +2756,8 @@ class obj_function:
 class obj_function_static(obj_function):
   """ Class representing a static function. """
 
+  __slots__ = ()
+
   def __init__(self, parent, attrib, retval, argval, comment):
     if not isinstance(parent, obj_class):
       raise Exception('Invalid parent object type')
@@ -1338,6 +2778,8 @@ class obj_function_static(obj_function):
 class obj_function_virtual(obj_function):
   """ Class representing a virtual function. """
 
+  __slots__ = ('isconst',)
+
   def __init__(self, parent, attrib, retval, argval, comment, vfmod):
     if not isinstance(parent, obj_class):
       raise Exception('Invalid parent object type')
@@ -1359,6 +2801,8 @@ class obj_function_virtual(obj_function):
 class obj_argument:
   """ Class representing a function argument. """
 
+  __slots__ = ('parent', 'type')
+
   def __init__(self, parent, argval):
     if not isinstance(parent, obj_function):
       raise Exception('Invalid parent object type')
@@ -1386,7 +2830,8 @@ class obj_argument:
   def remove_name(self):
     """ Remove and return the name value. """
     name = self.type.get_name()
-    self.type.name = None
+    # the analysis may be shared so replace it instead of modifying it
+    self.type = self.type.get_named(None)
     return name
 
   def get_type(self):
@@ -1614,22 +3059,33 @@ class obj_argument:
     return ''
 
 
+# regex for matching CEF reference, owned and raw pointer types
+_cre_ptr_type = re.compile('^Cef(RefPtr|OwnPtr|RawPtr)<(.*?)>$', re.DOTALL)
+_ptr_result_types = {'RefPtr': 'refptr', 'OwnPtr': 'ownptr', 'RawPtr': 'rawptr'}
+
+
 class obj_analysis:
   """ Class representing an analysis of a data type value. """
 
+  __slots__ = ('value', 'result_type', 'result_value', 'result_default',
+               'ptr_type', 'name', 'isconst', 'type', 'isbyref', 'isbyaddr',
+               'scoped')
+
   def __init__(self, scopelist, value, named):
     self.value = value
     self.result_type = 'unknown'
     self.result_value = None
     self.result_default = None
     self.ptr_type = None
+    # true if the type was resolved through a typedef in |scopelist|
+    self.scoped = False
 
     # parse the argument string
     partlist = value.strip().split()
 
     if named == True:
       # extract the name value
-      self.name = partlist[-1]
+      self.name = sys.intern(partlist[-1])
       del partlist[-1]
     else:
       self.name = None
@@ -1648,7 +3104,7 @@ class obj_analysis:
       raise Exception('Invalid argument value: ' + value)
 
     # combine the data type
-    self.type = ' '.join(partlist)
+    self.type = sys.intern(' '.join(partlist))
 
     # extract the last character of the data type
     endchar = self.type[-1]
@@ -1656,14 +3112,14 @@ class obj_analysis:
     # check if the value is passed by reference
     if endchar == '&':
       self.isbyref = True
-      self.type = self.type[:-1]
+      self.type = sys.intern(self.type[:-1])
     else:
       self.isbyref = False
 
     # check if the value is passed by address
     if endchar == '*':
       self.isbyaddr = True
-      self.type = self.type[:-1]
+      self.type = sys.intern(self.type[:-1])
     else:
       self.isbyaddr = False
 
@@ -1687,6 +3143,7 @@ class obj_analysis:
     # the translation succeeded so keep the result
     self.result_type = translation.result_type
     self.result_value = translation.result_value
+    self.scoped = True
 
   def _check_advanced(self, value):
     # check for vectors
@@ -1749,34 +3206,13 @@ class obj_analysis:
     if value[-2:] == '_t':
       return {'result_type': 'structure', 'result_value': value}
 
-    # check for CEF reference pointers
-    p = re.compile('^CefRefPtr<(.*?)>$', re.DOTALL)
-    list = p.findall(value)
-    if len(list) == 1:
-      return {
-          'result_type': 'refptr',
-          'result_value': get_capi_name(list[0], True) + '*',
-          'ptr_type': list[0]
-      }
-
-    # check for CEF owned pointers
-    p = re.compile('^CefOwnPtr<(.*?)>$', re.DOTALL)
-    list = p.findall(value)
-    if len(list) == 1:
-      return {
-          'result_type': 'ownptr',
-          'result_value': get_capi_name(list[0], True) + '*',
-          'ptr_type': list[0]
-      }
-
-    # check for CEF raw pointers
-    p = re.compile('^CefRawPtr<(.*?)>$', re.DOTALL)
-    list = p.findall(value)
-    if len(list) == 1:
+    # check for CEF reference, owned and raw pointers
+    match = _cre_ptr_type.match(value)
+    if not match is None:
       return {
-          'result_type': 'rawptr',
-          'result_value': get_capi_name(list[0], True) + '*',
-          'ptr_type': list[0]
+          'result_type': _ptr_result_types[match.group(1)],
+          'result_value': get_capi_name(match.group(2), True) + '*',
+          'ptr_type': match.group(2)
       }
 
     # check for CEF structure types
@@ -1791,6 +3227,19 @@ class obj_analysis:
   def __repr__(self):
     return '(' + self.result_type + ') ' + str(self.result_value)
 
+  def get_named(self, name):
+    """ Return a copy of this analysis with the specified name value. """
+    result = obj_analysis.__new__(obj_analysis)
+    for slot in obj_analysis.__slots__:
+      setattr(result, slot, getattr(self, slot))
+    if not name is None:
+      name = sys.intern(name)
+      if self.name is None:
+        # the value includes the name like the value of a named analysis
+        result.value = self.value + ' ' + name
+    result.name = name
+    return result
+
   def has_name(self):
     """ Returns true if a name value exists. """
     return (not self.name is None)
@@ -1833,6 +3282,10 @@ class obj_analysis:
     """ Returns true if the argument is passed by address. """
     return self.isbyaddr
 
+  def get_result_type(self):
+    """ Return the result type, e.g. 'simple', 'refptr' or 'vector'. """
+    return self.result_type
+
   def is_result_simple(self):
     """ Returns true if this is a simple argument type. """
     return (self.result_type == 'simple')
@@ -4,61 +4,286 @@
 
 import sys
 from cef_parser import *
-from make_interop import write_interop
+from make_interop import generation_cache, write_cached_outputs, \
+    write_interop, write_name_table, write_type_usage_table
 from optparse import OptionParser
 
 
-# cannot be loaded as a module
-if __name__ != "__main__":
-    sys.stderr.write('This file cannot be loaded as a module!')
-    sys.exit()
-    
+def parse_headers(options, platform):
+    """ Return the header object for the C++ headers compiled for |platform|,
+        or for all platforms if |platform| is None. """
+    if not options.quiet:
+        sys.stdout.write('Parsing C++ headers from '+options.cppheaderdir+
+                         ('' if platform is None else ' for '+platform)+'...\n')
+    header = obj_header(options.legacyparser, not options.notemplates,
+                        options.streaming, platform,
+                        not options.exportmodel is None)
+    if not options.parsecachedir is None:
+        header.set_parse_cache(obj_parse_cache(options.parsecachedir))
+    excluded_files = ['cef_application_mac.h', 'cef_version.h']
+    excluded_files += ['cef_thread.h', 'cef_waitable_event.h']
+    header.add_directory(options.cppheaderdir, excluded_files, options.jobs)
+    for name in ['cef_version.h', 'cef_api_hash.h']:
+        header.attach_file(os.path.join(options.cppheaderdir, name))
+
+    parse_cache = header.get_parse_cache()
+    if not parse_cache is None and not options.quiet:
+        sys.stdout.write('Parse cache: %d hits, %d misses.\n' %
+                         (parse_cache.hits, parse_cache.misses))
+    return header
+
+
+def get_platform_path(options, path, platform):
+    """ Return |path| with the platform name inserted before the extension
+        when generating all platforms. """
+    if options.platform != 'all':
+        return path
+    root, ext = os.path.splitext(path)
+    return root + '.' + platform + ext
+
+
+def generate(options, platform, stale, outputs=None):
+    """ Generate the output files for |platform|. If |outputs| is a dict the
+        paths of the generated files are added to it by output root. Returns
+        the number of files written. """
+    writect = 0
+
+    # create the header object
+    if options.model is None:
+        header = parse_headers(options, platform)
+    else:
+        if not options.quiet:
+            sys.stdout.write('Reading header model from '+options.model+'...\n')
+        header = read_model(options.model, options.streaming)
+
+    if not options.exportmodel is None:
+        header.write_model(get_platform_path(options, options.exportmodel, platform))
+
+    if not options.dumptypeusage is None:
+        write_type_usage_table(header, get_platform_path(options, options.dumptypeusage, platform))
+
+    if not options.exportnames is None:
+        write_name_table(header, 'cef3', get_platform_path(options, options.exportnames, platform))
+
+    if not options.cefgluedir is None:
+        cefgluedir = options.cefgluedir
+        templatedir = '.'
+        if options.platform == 'all':
+            cefgluedir = os.path.join(cefgluedir, platform)
+            templatedir = os.path.join(templatedir, platform)
+
+        # output cefglue interop
+        if not options.quiet:
+            sys.stdout.write('Generating CefGlue interop files...\n')
+        writect += write_interop(header, cefgluedir, not options.nobackup, 'cef3', options.cppheaderdir, options.incremental, not options.notemplates, options.jobs, options.iothreads, stale, outputs, templatedir)
+
+    if not options.quiet:
+        analyses = header.get_analysis_cache()
+        sys.stdout.write('Type analysis cache: %d hits, %d misses (%.1f%%).\n' %
+                         (analyses.hits, analyses.misses,
+                          analyses.get_hit_rate() * 100))
 
-# parse command-line options
-disc = """
+    return writect
+
+
+def get_output_roots(options, platform):
+    """ Return the output directories by output root for |platform|. """
+    roots = {'interop': options.cefgluedir, 'templates': '.'}
+    if options.platform == 'all':
+        roots['interop'] = os.path.join(roots['interop'], platform)
+        roots['templates'] = os.path.join(roots['templates'], platform)
+    return roots
+
+
+def generate_cached(options, platform, stale, cache):
+    """ Update the output files for |platform| from the generation cache, or
+        generate them and add them to the cache. Returns the number of files
+        written. """
+    if options.model is None:
+        inputpath = options.cppheaderdir
+    else:
+        inputpath = options.model
+    key = cache.get_key(inputpath, 'platform=%s;templates=%s' %
+                        (platform, not options.notemplates))
+    roots = get_output_roots(options, platform)
+    with cache.lock(key):
+        files = cache.load(key)
+        if not files is None:
+            if not options.quiet:
+                sys.stdout.write('Using cached output set '+key+
+                                 ('' if platform is None else ' for '+platform)+
+                                 '...\n')
+            return write_cached_outputs(files, roots, not options.nobackup,
+                                        stale)
+
+        outputs = {}
+        writect = generate(options, platform, stale, outputs)
+        # generated in memory only when checking
+        if stale is None:
+            cache.store(key, roots, outputs)
+        return writect
+
+
+def main():
+    # parse command-line options
+    disc = """
 This utility generates files for the CEF C++ to C API translation layer.
 """
 
-parser = OptionParser(description=disc)
-parser.add_option('--cpp-header-dir', dest='cppheaderdir', metavar='DIR',
-                  help='input directory for C++ header files [required]')
-parser.add_option('--cefglue-dir', dest='cefgluedir', metavar='DIR',
-                  help='output directory for cefglue interop files')
-parser.add_option('--no-backup',
-                  action='store_true', dest='nobackup', default=False,
-                  help='do not create a backup of modified files')
-parser.add_option('-q', '--quiet',
-                  action='store_true', dest='quiet', default=False,
-                  help='do not output detailed status information')
-(options, args) = parser.parse_args()
-
-# required options: cppheader, cef1 or cef3
-if options.cppheaderdir is None or options.cefgluedir is None:
-    parser.print_help(sys.stdout)
-    sys.exit()
+    parser = OptionParser(description=disc)
+    parser.add_option('--cpp-header-dir', dest='cppheaderdir', metavar='DIR',
+                      help='input directory for C++ header files [required]')
+    parser.add_option('--cefglue-dir', dest='cefgluedir', metavar='DIR',
+                      help='output directory for cefglue interop files')
+    parser.add_option('--no-backup',
+                      action='store_true', dest='nobackup', default=False,
+                      help='do not create a backup of modified files')
+    parser.add_option('--incremental',
+                      action='store_true', dest='incremental', default=False,
+                      help='only generate files whose input headers, classes '+
+                           'or schema entries changed since the last run')
+    parser.add_option('--check',
+                      action='store_true', dest='check', default=False,
+                      help='only compare the generated files with the files '+
+                           'in the output directories and exit with a '+
+                           'non-zero status if any differs; nothing is '+
+                           'written and the implementation templates and '+
+                           'CefGlue.g.props are not generated')
+    parser.add_option('--no-templates',
+                      action='store_true', dest='notemplates', default=False,
+                      help='do not generate the implementation templates; '+
+                           'header comments are then not parsed')
+    parser.add_option('--legacy-parser',
+                      action='store_true', dest='legacyparser', default=False,
+                      help='parse headers with the regex parser instead of the '+
+                           'token scanner')
+    parser.add_option('--streaming',
+                      action='store_true', dest='streaming', default=False,
+                      help='keep only the classes of one header in memory '+
+                           'at a time while generating')
+    parser.add_option('--parse-cache-dir', dest='parsecachedir', metavar='DIR',
+                      help='directory for caching the declarations parsed '+
+                           'from each header')
+    parser.add_option('--export-names', dest='exportnames', metavar='FILE',
+                      help='write the C API and C# names of all classes and '+
+                           'functions to a JSON file')
+    parser.add_option('--dump-type-usage', dest='dumptypeusage', metavar='FILE',
+                      help='write the functions and arguments that use each '+
+                           'C++ type, result type, pointer type, vector '+
+                           'element type and attribute to a JSON file')
+    parser.add_option('--cache-dir', dest='cachedir', metavar='DIR',
+                      help='directory for sharing complete output sets '+
+                           'between checkouts; a run with the same headers, '+
+                           'generator sources and options copies the files '+
+                           'from the cache instead of generating them; '+
+                           'entries are never removed, delete the directory '+
+                           'to reclaim space')
+    parser.add_option('--model', dest='model', metavar='FILE',
+                      help='generate from a header model written by '+
+                           '--export-model instead of parsing C++ headers')
+    parser.add_option('--export-model', dest='exportmodel', metavar='FILE',
+                      help='write the parsed header model to a JSON file')
+    parser.add_option('--platform', dest='platform', metavar='NAME',
+                      choices=list(platform_names) + ['all'],
+                      help='only generate the declarations compiled for '+
+                           'the specified platform (windows, mac or linux); '+
+                           'all generates each platform into a subdirectory '+
+                           'of the output directories and of the current '+
+                           'directory for the implementation templates')
+    parser.add_option('-j', '--jobs', type='int', dest='jobs', default=1,
+                      metavar='N',
+                      help='number of worker processes used to parse headers '+
+                           'and, where worker processes are forked, to '+
+                           'generate class files')
+    parser.add_option('--io-threads', type='int', dest='iothreads', default=0,
+                      metavar='N',
+                      help='number of threads that compare and write the '+
+                           'generated files in the background; 0 writes '+
+                           'them synchronously')
+    parser.add_option('-q', '--quiet',
+                      action='store_true', dest='quiet', default=False,
+                      help='do not output detailed status information')
+    (options, args) = parser.parse_args()
 
-# make sure the header exists
-if not path_exists(options.cppheaderdir):
-    sys.stderr.write('File '+options.cppheaderdir+' does not exist.')
-    sys.exit()
+    # required options: cppheader or model, and at least one output
+    if (options.cppheaderdir is None and options.model is None) or \
+        (options.cefgluedir is None and options.exportmodel is None and
+         options.dumptypeusage is None and options.exportnames is None):
+        parser.print_help(sys.stdout)
+        sys.exit()
 
-# create the header object
-if not options.quiet:
-    sys.stdout.write('Parsing C++ headers from '+options.cppheaderdir+'...\n')
-header = obj_header()
-excluded_files = ['cef_application_mac.h', 'cef_version.h']
-excluded_files += ['cef_thread.h', 'cef_waitable_event.h']
-header.add_directory(options.cppheaderdir, excluded_files)
+    # make sure the header exists
+    if not options.model is None:
+        if not path_exists(options.model):
+            sys.stderr.write('File '+options.model+' does not exist.')
+            sys.exit()
+        if not options.platform is None:
+            sys.stderr.write('The platform of a header model cannot be changed.')
+            sys.exit()
+    elif not path_exists(options.cppheaderdir):
+        sys.stderr.write('File '+options.cppheaderdir+' does not exist.')
+        sys.exit()
 
-writect = 0
+    if options.check:
+        if options.cefgluedir is None or not options.exportmodel is None or \
+            not options.exportnames is None or not options.dumptypeusage is None:
+            sys.stderr.write('--check only compares the files of the output '+
+                             'directories.')
+            sys.exit(2)
+        # the templates are not checked in
+        options.notemplates = True
+        stale = []
+    else:
+        stale = None
 
-if not options.cefgluedir is None:
-    # output cefglue interop
-    if not options.quiet:
-        sys.stdout.write('Generating CefGlue interop files...\n')
-    writect += write_interop(header, options.cefgluedir, not options.nobackup, 'cef3', options.cppheaderdir)
+    if not options.cachedir is None:
+        if options.cefgluedir is None or not options.exportmodel is None or \
+            not options.exportnames is None or not options.dumptypeusage is None:
+            sys.stderr.write('--cache-dir only caches the files of the output '+
+                             'directories.')
+            sys.exit(2)
+        # the cached files are read back from the output directories, so
+        # they must all have been generated by this run
+        if options.incremental:
+            sys.stderr.write('--incremental cannot be used with --cache-dir.')
+            sys.exit(2)
+
+    if options.platform is None:
+        platforms = [None]
+    elif options.platform == 'all':
+        platforms = list(platform_names)
+    else:
+        platforms = [options.platform]
+
+    writect = 0
 
-if not options.quiet:
-    sys.stdout.write('Done - Wrote '+str(writect)+' files.\n')
+    if options.cachedir is None:
+        cache = None
+    else:
+        cache = generation_cache(options.cachedir)
 
+    for platform in platforms:
+        if cache is None:
+            writect += generate(options, platform, stale)
+        else:
+            writect += generate_cached(options, platform, stale, cache)
 
+    if options.check:
+        if len(stale) > 0:
+            sys.stdout.write('Stale files:\n')
+            for path in sorted([os.path.normpath(x) for x in stale]):
+                sys.stdout.write('  '+path+'\n')
+            sys.exit(1)
+        if not options.quiet:
+            sys.stdout.write('Done - All files are up-to-date.\n')
+    elif not options.quiet:
+        sys.stdout.write('Done - Wrote '+str(writect)+' files.\n')
+
+
+if __name__ == "__main__":
+    main()
+elif __name__ != "__mp_main__":
+    # cannot be loaded as a module (worker processes started by the
+    # multiprocessing module import it as __mp_main__)
+    sys.stderr.write('This file cannot be loaded as a module!')
+    sys.exit()
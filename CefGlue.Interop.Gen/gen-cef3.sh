@@ -1,5 +1,5 @@
 #!/bin/sh
 
 # @echo off
-/usr/bin/python3 -B cefglue_interop_gen.py --cpp-header-dir include --cefglue-dir ../CefGlue/ --no-backup
+/usr/bin/python3 -B cefglue_interop_gen.py --cpp-header-dir include --cefglue-dir ../CefGlue/ --no-backup --parse-cache-dir .cache/parse
 read -p "Press any key to resume ..."
@@ -5,9 +5,19 @@ from cef_parser import *
 import sys
 import schema
 import file_util
+import hashlib
+import json
 import os
+import queue
+import threading
 from xml.dom.minidom import getDOMImplementation
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
 #
 # settings
 #
@@ -16,7 +26,28 @@ indent = '    '
 #
 # Common
 #
+
+# Function parts and vtable layouts are computed once per function and class.
+# They depend on the loaded schema, so write_interop clears them.
+func_parts_cache = {}
+vtable_layouts = {}
+
+def clear_layout_caches():
+    func_parts_cache.clear()
+    vtable_layouts.clear()
+
 def get_func_parts(func, slot, is_global = False):
+    key = (func, is_global)
+    parts = func_parts_cache.get(key)
+    if parts is None:
+        parts = make_func_parts(func, is_global)
+        func_parts_cache[key] = parts
+    result = dict(parts)
+    result['slot'] = '%x' % slot
+    result['delegate_slot'] = '_ds%x' % slot
+    return result
+
+def make_func_parts(func, is_global):
     virtual = isinstance(func, obj_function_virtual)
     capi_parts = func.get_capi_parts()
 
@@ -40,7 +71,7 @@ def get_func_parts(func, slot, is_global = False):
     for carg in capi_parts['args']:
         # C Function prototype: some_name(void) is function without arguments for us
         if carg != "void":
-          type = schema.c2cs_type( carg[:carg.rindex(' ')] )
+          type = schema.c2cs_type( carg[:carg.rindex(' ')], func.get_qualified_name() )
           name = schema.quote_name( carg[carg.rindex(' ')+1:] )
           csn_args.append({'name' : name, 'type' : type})
 
@@ -52,18 +83,16 @@ def get_func_parts(func, slot, is_global = False):
         'basefunc': False,
         'virtual': virtual,
         'obj': func,
-        'slot': '%x' % slot,
         'name': func.get_name(),
         'field_name': '_' + func.get_capi_name(),
         'delegate_type': func.get_capi_name() + '_delegate',
-        'delegate_slot': '_ds%x' % slot,
 
         'capi_name': capi_parts['name'],
         'capi_retval': capi_parts['retval'],
         'capi_args': capi_parts['args'],
 
         'csn_name': csn_name,
-        'csn_retval': schema.c2cs_type( capi_parts['retval'] ),
+        'csn_retval': schema.c2cs_type( capi_parts['retval'], func.get_qualified_name() ),
         'csn_args': csn_args,
         'csn_entrypoint': capi_parts['name'],
 
@@ -164,6 +193,18 @@ def make_struct_file(cls):
       }
 
 def get_funcs(cls, base = True, inherited = True):
+    """ Return the vtable layout of |cls|: the parts of the base class
+        functions, if |base| is true, followed by the virtual functions of the
+        root-most class first, or only of |cls| if |inherited| is false. The
+        layout is computed once and must not be modified. """
+    key = (cls, base, inherited)
+    funcs = vtable_layouts.get(key)
+    if funcs is None:
+        funcs = make_vtable_layout(cls, base, inherited)
+        vtable_layouts[key] = funcs
+    return funcs
+
+def make_vtable_layout(cls, base, inherited):
     funcs = []
 
     classes = []
@@ -191,11 +232,10 @@ def get_funcs(cls, base = True, inherited = True):
     return funcs
 
 def get_top_base_class_name(cls):
-    while cls is not None:
-        if is_base_class(cls.parent_name):
-            return cls.get_parent_capi_name()
-        cls = cls.parent.get_class(cls.parent_name)
-    return None
+    base_class_name = cls.get_base_class_name()
+    if base_class_name is None:
+        return None
+    return get_capi_name(base_class_name, True)
 
 def make_struct_members(cls):
     result = []
@@ -228,32 +268,32 @@ def make_struct_members(cls):
     for func in funcs:
         postfixs = schema.get_platform_retval_postfixs(func['csn_retval'])
         for px in postfixs:
-            func['px'] = px
+            pxfunc = dict(func, px = px)
             result.append('[UnmanagedFunctionPointer(%s)]' % schema.CEF_CALLBACK)
             result.append('#if !DEBUG')
             result.append('[SuppressUnmanagedCodeSecurity]')
             result.append('#endif')
-            result.append(delegate_visibility + ' delegate %(csn_retval)s%(px)s %(delegate_type)s%(px)s(%(csn_args_proto)s);' % func)
+            result.append(delegate_visibility + ' delegate %(csn_retval)s%(px)s %(delegate_type)s%(px)s(%(csn_args_proto)s);' % pxfunc)
             result.append('')
 
     for func in funcs:
         if schema.is_proxy(cls):
             postfixs = schema.get_platform_retval_postfixs(func['csn_retval'])
             for px in postfixs:
-                func['px'] = px
-                result.append('// %(name)s' % func)
-                result.append('private static IntPtr _p%(slot)s%(px)s;' % func)
-                result.append('private static %(delegate_type)s%(px)s _d%(slot)s%(px)s;' % func)
+                pxfunc = dict(func, px = px)
+                result.append('// %(name)s' % pxfunc)
+                result.append('private static IntPtr _p%(slot)s%(px)s;' % pxfunc)
+                result.append('private static %(delegate_type)s%(px)s _d%(slot)s%(px)s;' % pxfunc)
                 result.append('')
-                result.append('public static %(csn_retval)s%(px)s %(csn_name)s%(px)s(%(csn_args_proto)s)' % func)
+                result.append('public static %(csn_retval)s%(px)s %(csn_name)s%(px)s(%(csn_args_proto)s)' % pxfunc)
                 result.append('{')
-                result.append('    %(delegate_type)s%(px)s d;' % func)
-                result.append('    var p = self->%(field_name)s;' % func)
-                result.append('    if (p == _p%(slot)s%(px)s) { d = _d%(slot)s%(px)s; }' % func)
+                result.append('    %(delegate_type)s%(px)s d;' % pxfunc)
+                result.append('    var p = self->%(field_name)s;' % pxfunc)
+                result.append('    if (p == _p%(slot)s%(px)s) { d = _d%(slot)s%(px)s; }' % pxfunc)
                 result.append('    else')
                 result.append('    {')
-                result.append('        d = (%(delegate_type)s%(px)s)Marshal.GetDelegateForFunctionPointer(p, typeof(%(delegate_type)s%(px)s));' % func)
-                result.append('        if (_p%(slot)s%(px)s == IntPtr.Zero) { _d%(slot)s%(px)s = d; _p%(slot)s%(px)s = p; }' % func)
+                result.append('        d = (%(delegate_type)s%(px)s)Marshal.GetDelegateForFunctionPointer(p, typeof(%(delegate_type)s%(px)s));' % pxfunc)
+                result.append('        if (_p%(slot)s%(px)s == IntPtr.Zero) { _d%(slot)s%(px)s = d; _p%(slot)s%(px)s = p; }' % pxfunc)
                 result.append('    }')
                 args = ', '.join(map(lambda x: x['name'], func['csn_args']))
                 if func['csn_retval'] == 'void':
@@ -820,9 +860,9 @@ def make_version_cs(content, api_hash_content):
 
     result.append('public const string CEF_API_HASH_UNIVERSAL = %s;' % __get_version_constant(api_hash_content, "CEF_API_HASH_UNIVERSAL"))
     result.append("");
-    result.append('public const string CEF_API_HASH_PLATFORM_WIN = %s;' % __get_version_constant(api_hash_content, "CEF_API_HASH_PLATFORM", "WIN"))
-    result.append('public const string CEF_API_HASH_PLATFORM_MACOS = %s;' % __get_version_constant(api_hash_content, "CEF_API_HASH_PLATFORM", "MAC"))
-    result.append('public const string CEF_API_HASH_PLATFORM_LINUX = %s;' % __get_version_constant(api_hash_content, "CEF_API_HASH_PLATFORM", "LINUX"))
+    result.append('public const string CEF_API_HASH_PLATFORM_WIN = %s;' % __get_version_constant(api_hash_content, "CEF_API_HASH_PLATFORM", "windows"))
+    result.append('public const string CEF_API_HASH_PLATFORM_MACOS = %s;' % __get_version_constant(api_hash_content, "CEF_API_HASH_PLATFORM", "mac"))
+    result.append('public const string CEF_API_HASH_PLATFORM_LINUX = %s;' % __get_version_constant(api_hash_content, "CEF_API_HASH_PLATFORM", "linux"))
 
     body = []
     body.append('using System;')
@@ -846,28 +886,456 @@ def make_version_cs(content, api_hash_content):
       }
 
 def __get_version_constant(content, name, platform = None):
-    if platform is None:
-        m = re.search(r'^#define\s+' + name + r'\s+(.*?)\n', content, re.MULTILINE)
-        if m is None:
-            raise Exception('Could not find ' + name + ' constant.');
-        value = m.group(1)
-    else:
-        m = re.search(r'\n#e?l?if defined\(OS_' + platform + r'\)\n+#define\s+' + name + r'\s+(.*?)\n', content, re.DOTALL)
-        if m is None:
-            raise Exception('Could not find ' + name + ' constant.');
-        value = m.group(1)
+    value = get_header_defines(content, platform).get(name)
+    if value is None:
+        raise Exception('Could not find ' + name + ' constant.');
     return value
 
+#
+# Class file emission
+#
+def make_class_file(cls, kind):
+    """ Return the contents of the 'struct', 'wrapper' or 'tmpl' file of |cls|. """
+    if kind == 'struct':
+        return make_struct_file(cls)
+    elif kind == 'wrapper':
+        return make_wrapper_g_file(cls)
+    elif kind == 'tmpl':
+        return make_impl_tmpl_file(cls)
+    raise Exception('Unknown class file kind %s' % kind)
+
+class class_emitter:
+    """ Generates class files in a pool of forked worker processes that
+        inherit the header and returns the files in job order, so that the
+        output is identical to generating them in this process. """
+
+    def __init__(self, header, jobs):
+        self.header = header
+        self.jobs = jobs
+        self.pool = None
+
+    @staticmethod
+    def is_supported():
+        """ Returns true if the workers can inherit the header. Loading the
+            header model in each worker takes longer than generating all class
+            files in this process, so the other start methods are not used. """
+        import multiprocessing
+        return multiprocessing.get_start_method() == 'fork'
+
+    def start(self):
+        import multiprocessing
+        global _worker_header
+        _worker_header = self.header
+        self.pool = multiprocessing.Pool(self.jobs, _init_class_worker)
+
+    def make_files(self, jobs):
+        """ Return the contents of the (class, kind) |jobs|. """
+        if len(jobs) < 2:
+            return [make_class_file(cls, kind) for cls, kind in jobs]
+        if self.pool is None:
+            self.start()
+        args = [(self.header.class_positions[cls], kind) for cls, kind in jobs]
+        chunksize = max(1, len(args) // (self.jobs * 4))
+        contents = []
+        for content, unmapped in self.pool.map(_make_class_file, args, chunksize):
+            # keep the warnings of the workers in job order
+            schema.add_unmapped_types(unmapped)
+            contents.append(content)
+        return contents
+
+    def close(self):
+        global _worker_header
+        if not self.pool is None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+            _worker_header = None
+
+# header of the class_emitter worker processes, inherited when they are forked
+_worker_header = None
+
+def _init_class_worker():
+    # the warnings recorded so far are reported by the parent
+    schema.pop_unmapped_types()
+
+def _make_class_file(args):
+    """ Runs in the worker processes started by class_emitter. """
+    index, kind = args
+    content = make_class_file(_worker_header.get_classes()[index], kind)
+    return (content, schema.pop_unmapped_types())
+
+#
+# Dependency tracking
+#
+deps_filename = 'CefGlue.g.deps'
+deps_version = 1
+
+class interop_deps:
+    """ Records the headers, classes and schema entries that each generated
+        file depends on. In incremental mode files whose inputs did not change
+        since the previous run are not generated again. """
+
+    def __init__(self, header, filepath, incremental):
+        self.header = header
+        self.incremental = incremental
+        self.path = filepath + '/' + deps_filename
+        self.outputs = {}
+        self.previous = {}
+        if incremental and path_exists(self.path):
+            try:
+                state = json.loads(read_file(self.path))
+                if state.get('version') == deps_version:
+                    self.previous = state['outputs']
+            except ValueError:
+                pass
+        self.global_hash = self.get_global_hash()
+
+    def get_global_hash(self):
+        """ Hash of the inputs shared by all generated files: the generator
+            sources, the set of classes, the global typedefs and the
+            platform. """
+        hash = hashlib.sha1()
+        gendir = os.path.dirname(os.path.abspath(__file__))
+        for name in ['cef_parser.py', 'make_interop.py', 'schema.py']:
+            hash.update(read_file(os.path.join(gendir, name)).encode('utf-8'))
+        for cls in self.header.get_classes():
+            hash.update(('class %s;' % cls.get_capi_name()).encode('utf-8'))
+        for typedef in self.header.get_typedefs():
+            hash.update(str(typedef).encode('utf-8'))
+        hash.update(('platform %s;' % self.header.platform).encode('utf-8'))
+        return hash.hexdigest()
+
+    def get_class_inputs(self, cls):
+        """ Return the inputs of the files generated for |cls|: the headers
+            and schema entries of the class and all of its parents. """
+        classes = []
+        headers = {}
+        schema_entries = {}
+        current = cls
+        while current is not None:
+            name = current.get_name()
+            classes.append(name)
+            headers[current.get_file_name()] = self.header.get_file_hash(current.get_file_name())
+            schema_entries[name] = schema.classdef.get(name)
+            current = self.header.get_class(current.get_parent_name())
+        return { 'headers': headers, 'classes': classes, 'schema': schema_entries }
+
+    def get_funcs_inputs(self, funcs):
+        """ Return the inputs of a file generated from global functions. """
+        headers = {}
+        for func in funcs:
+            headers[func.get_file_name()] = self.header.get_file_hash(func.get_file_name())
+        return { 'headers': headers }
+
+    def get_files_inputs(self, files):
+        """ Return the inputs of a file generated directly from header files.
+            |files| maps the file names to their contents. """
+        headers = {}
+        for filename, content in files.items():
+            headers[filename] = get_content_hash(content)
+        return { 'headers': headers }
+
+    def is_current(self, path, inputs):
+        """ Record the inputs of the file at |path|. Returns true if it exists
+            and the inputs are unchanged since the previous run. """
+        signature = hashlib.sha1(json.dumps([self.global_hash, inputs], sort_keys = True).encode('utf-8')).hexdigest()
+        entry = dict(inputs)
+        entry['signature'] = signature
+        self.outputs[path] = entry
+        if not self.incremental:
+            return False
+        previous = self.previous.get(path)
+        return previous is not None and previous['signature'] == signature and path_exists(path)
+
+    def save(self):
+        """ Write the recorded dependencies for the next incremental run.
+            Full runs write them as well, so that the file always describes
+            the inputs of the current outputs. """
+        write_file(self.path, json.dumps({ 'version': deps_version, 'outputs': self.outputs }, indent = 1, sort_keys = True) + '\n')
+
+#
+# Output manifest
+#
+manifest_filename = 'CefGlue.g.manifest'
+manifest_version = 1
+
+class output_manifest:
+    """ Records the content hash, size and modification time of each
+        generated file. A file whose size and modification time still match
+        the manifest is compared by hash without reading it. """
+
+    def __init__(self, filepath):
+        self.path = filepath + '/' + manifest_filename
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.previous = {}
+        # files modified at or after the manifest was written may have changed
+        # without a change of the modification time
+        self.racy_time = 0
+        if path_exists(self.path):
+            try:
+                state = json.loads(read_file(self.path))
+                if state.get('version') == manifest_version:
+                    self.previous = state['files']
+                    self.racy_time = os.stat(self.path).st_mtime_ns
+            except ValueError:
+                pass
+
+    def get_hash(self, path):
+        """ Return the content hash of the file at |path| if it is unchanged
+            since it was recorded, otherwise None. """
+        entry = self.previous.get(os.path.normpath(path))
+        if entry is None:
+            return None
+        hash, size, mtime = entry
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if stat.st_size != size or stat.st_mtime_ns != mtime or mtime >= self.racy_time:
+            return None
+        return hash
+
+    def record(self, path, hash):
+        """ Record the file at |path| with the content hash |hash|. """
+        stat = os.stat(path)
+        with self.lock:
+            self.entries[os.path.normpath(path)] = [hash, stat.st_size, stat.st_mtime_ns]
+
+    def keep(self, path):
+        """ Keep the entry of a file that was not generated again. """
+        path = os.path.normpath(path)
+        with self.lock:
+            if path in self.previous:
+                self.entries[path] = self.previous[path]
+
+    def save(self):
+        """ Write the recorded files. """
+        write_file(self.path, json.dumps({ 'version': manifest_version, 'files': self.entries }, indent = 1, sort_keys = True) + '\n')
+
+#
+# Generation cache
+#
+generation_cache_version = 1
+
+class generation_cache:
+    """ Content-addressed cache of complete output sets that can be shared
+        between checkouts. Entries are keyed by a hash of the input headers,
+        the generator sources (including the schema) and the options that
+        change the output. Runs that use the same key are serialized by a
+        lock file, so a concurrent run waits for the entry instead of
+        generating it again. Entries are never evicted: the directory grows
+        by one output set (about 2 MB for the bundled headers) for each
+        combination of headers, generator sources and options, and can be
+        deleted at any time when no run is using it. """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(self, inputpath, options):
+        """ Return the key for generating from the header directory or model
+            file |inputpath| with the |options| string. """
+        hash = hashlib.sha1()
+        hash.update(('%d:%s:' % (generation_cache_version, options)).encode('utf-8'))
+        gendir = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(os.listdir(gendir)):
+            if name.endswith('.py'):
+                hash.update(('%s:' % name).encode('utf-8'))
+                hash.update(read_file(os.path.join(gendir, name)).encode('utf-8'))
+        if os.path.isdir(inputpath):
+            names = []
+            for dirpath, dirnames, filenames in os.walk(inputpath):
+                for filename in filenames:
+                    names.append(os.path.relpath(os.path.join(dirpath, filename), inputpath).replace(os.sep, '/'))
+            for name in sorted(names):
+                hash.update(('%s:' % name).encode('utf-8'))
+                hash.update(read_file(os.path.join(inputpath, name)).encode('utf-8'))
+        else:
+            hash.update(read_file(inputpath).encode('utf-8'))
+        return hash.hexdigest()
+
+    def get_path(self, key):
+        """ Return the file path for the specified key. """
+        return os.path.join(self.directory, key + '.json')
+
+    def lock(self, key):
+        """ Return a file_lock for the specified key. """
+        return file_lock(os.path.join(self.directory, key + '.lock'))
+
+    def load(self, key):
+        """ Return the output set stored for |key| or None. The output set
+            maps the output root names to dicts of the relative file paths
+            and contents. """
+        path = self.get_path(key)
+        if not path_exists(path):
+            self.misses += 1
+            return None
+        try:
+            state = json.loads(read_file(path))
+        except ValueError:
+            # ignore damaged entries, they will be replaced
+            state = None
+        if state is None or state.get('version') != generation_cache_version:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return state['outputs']
+
+    def store(self, key, roots, outputs):
+        """ Store the files of |outputs|, a dict of the output root names to
+            lists of file paths, for |key|. |roots| maps the output root names
+            to their directories. The files are read from the output
+            directories, so all of them must have been generated, not kept
+            by an incremental run. """
+        files = {}
+        for name, paths in outputs.items():
+            files[name] = {}
+            for path in paths:
+                relpath = os.path.relpath(path, roots[name]).replace(os.sep, '/')
+                files[name][relpath] = read_file(path)
+        make_dir(self.directory)
+        # write to a temporary file first so that concurrent readers never see
+        # partial entries
+        path = self.get_path(key)
+        temp_path = '%s.%d.tmp' % (path, os.getpid())
+        write_file(temp_path, json.dumps({ 'version': generation_cache_version, 'outputs': files }, separators = (',', ':')))
+        os.replace(temp_path, path)
+
+class file_lock:
+    """ Exclusive lock of a file, held while used as a context manager. """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        make_dir(os.path.dirname(self.path))
+        self.file = open(self.path, 'a')
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        else:
+            self.file.seek(0)
+            while True:
+                try:
+                    # LK_LOCK gives up after 10 seconds; keep waiting for
+                    # the other run like flock() does
+                    msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass
+        return self
+
+    def __exit__(self, type, value, traceback):
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.file.close()
+        self.file = None
+
+def write_cached_outputs(files, roots, backup, stale = None):
+    """ Update the output directories |roots|, a dict of the output root
+        names to directories, from the output set |files| loaded from a
+        generation_cache. If |stale| is a list the files except the project
+        props file are only compared and the paths of the files that differ
+        are appended to it. """
+    writect = 0
+    check = stale is not None
+    manifest = output_manifest(roots['interop'])
+    for name in sorted(files.keys()):
+        for relpath in sorted(files[name].keys()):
+            if check and relpath == project_props_filename:
+                continue
+            path = os.path.normpath(os.path.join(roots[name], relpath))
+            writect += update_file(None, os.path.dirname(path), os.path.basename(path), files[name][relpath], backup, manifest, stale)
+
+    if not check:
+        manifest.save()
+        # the recorded dependencies no longer match the files
+        deps_path = roots['interop'] + '/' + deps_filename
+        if path_exists(deps_path):
+            os.remove(deps_path)
+    return writect
+
+#
+# Name table
+#
+def make_name_table(header):
+    """ Return the C API and C# names of all classes and functions. Functions
+        are keyed by their qualified name. The classes are loaded one header
+        file at a time so that this also works in streaming mode. Must be
+        called after schema.load(); the names do not depend on the generated
+        files. """
+    classes = {}
+    functions = {}
+    for func in header.get_funcs():
+        functions[func.get_qualified_name()] = make_function_names(func, True)
+    for file_classes in header.iter_file_classes():
+        for cls in file_classes:
+            classes[cls.get_name()] = {
+                'capi_name': cls.get_capi_name(),
+                'cs_name': schema.cpp2csname(cls.get_name()),
+                'iname': schema.get_iname(cls),
+            }
+            for func in cls.get_static_funcs() + cls.get_virtual_funcs():
+                functions[func.get_qualified_name()] = make_function_names(func, False)
+    return { 'classes': classes, 'functions': functions, 'cs_keywords': sorted(schema.cs_keywords) }
+
+def make_function_names(func, is_global):
+    """ Return the C API name and the C# method and argument names of |func|
+        as used in the generated interop files. """
+    parts = get_func_parts(func, 0, is_global)
+    return {
+        'capi_name': parts['capi_name'],
+        'cs_name': parts['csn_name'],
+        'cs_args': [x['name'] for x in parts['csn_args']],
+    }
+
+def write_name_table(header, schema_name, filename):
+    """ Write the make_name_table() result as JSON. """
+    schema.load(schema_name, header)
+    write_file(filename, json.dumps(make_name_table(header), indent = 1, sort_keys = True) + '\n')
+
+def make_type_usage_table(header):
+    """ Return the obj_type_usage_index table of all global and class
+        functions. The classes are indexed one header file at a time so that
+        this also works in streaming mode. """
+    table = obj_type_usage_index(header.get_funcs()).get_table()
+    for classes in header.iter_file_classes():
+        index = obj_type_usage_index()
+        for cls in classes:
+            index.add_class(cls)
+        for kind, values in index.get_table().items():
+            for value, names in values.items():
+                table.setdefault(kind, {}).setdefault(value, []).extend(names)
+    return table
+
+def write_type_usage_table(header, filename):
+    """ Write the make_type_usage_table() result as JSON. """
+    write_file(filename, json.dumps(make_type_usage_table(header), indent = 1, sort_keys = True) + '\n')
+
 #
 # Main
 #
-def write_interop(header, filepath, backup, schema_name, cppheaderdir):
+def write_interop(header, filepath, backup, schema_name, cppheaderdir, incremental = False, templates = True, jobs = 1, io_threads = 0, stale = None, outputs = None, templatedir = '.'):
+    """ Generate the interop files to |filepath|. If |stale| is a list the
+        files are only compared with the existing files, the paths of the
+        files that differ are appended to it and nothing is written; the
+        project props file is then not generated. If
+        |outputs| is a dict the paths of the generated files are added to it
+        by output root: 'interop' for |filepath| and 'templates' for
+        |templatedir|, the directory of the implementation templates. """
     writect = 0
+    check = stale is not None
 
-    project_props_filename = "CefGlue.g.props"
     project_props_compile_items = []
+    template_items = []
 
     schema.load(schema_name, header)
+    clear_layout_caches()
 
     # validate: class role must be defined for all header classes
     for cls in header.get_classes():
@@ -876,47 +1344,96 @@ def write_interop(header, filepath, backup, schema_name, cppheaderdir):
             sys.stdout.write('ERROR! %s\n' % msg)
             raise Exception(msg)
 
-    # structs
-    for cls in header.get_classes():
-        content = make_struct_file(cls)
-        writect += update_file(project_props_compile_items, filepath + '/' + schema.struct_path, cls.get_capi_name() + ".g.cs", content, backup)
-
-    # libcef.g.cs
-    writect += update_file(project_props_compile_items, filepath + '/' + schema.libcef_path, schema.libcef_filename, make_libcef_file(header), backup)
-
-    # wrapper
-    for cls in header.get_classes():
-        content = make_wrapper_g_file(cls)
-        writect += update_file(project_props_compile_items, filepath + '/' + schema.wrapper_g_path, schema.cpp2csname(cls.get_name()) + ".g.cs", content, backup)
-
-    # userdata
-    userdatacls = obj_class(header, 'CefUserData', '', 'CefUserData', 'CefBaseRefCounted', '', '', '', [])
-    content = make_struct_file(userdatacls)
-    writect += update_file(project_props_compile_items, filepath + '/' + schema.struct_path, userdatacls.get_capi_name() + ".g.cs", content, backup)
-    content = make_wrapper_g_file(userdatacls)
-    writect += update_file(project_props_compile_items, filepath + '/' + schema.wrapper_g_path, schema.cpp2csname(userdatacls.get_name()) + ".g.cs", content, backup)
-
-    # impl template
-    for cls in header.get_classes():
-        content = make_impl_tmpl_file(cls)
-        tmplpath = schema.handler_tmpl_path
-        if schema.is_proxy(cls):
-            tmplpath = schema.proxy_tmpl_path
-        writect += update_file(None, './' + tmplpath, schema.cpp2csname(cls.get_name()) + ".tmpl.g.cs", content, backup)
-
-    # process cef_version.h and cef_api_hash.h
-    content = make_version_cs(read_file(cppheaderdir + '/' + 'cef_version.h'), read_file(cppheaderdir + '/' + 'cef_api_hash.h'),)
-    writect += update_file(project_props_compile_items, filepath + '/' + schema.libcef_path, schema.libcef_version_filename, content, backup)
-
-    # make project props file
-    content = make_props_file(project_props_compile_items, filepath)
-    writect += update_file(None, filepath, project_props_filename, content, backup)
+    # validate: parent classes must be defined
+    undefined_parents = header.get_class_hierarchy().get_undefined_parents()
+    for name in sorted(undefined_parents.keys()):
+        msg = 'Parent class must be defined. Class name %s, parent class name %s.' % (name, undefined_parents[name])
+        sys.stdout.write('ERROR! %s\n' % msg)
+        raise Exception(msg)
+
+    # the dependencies only tell whether the inputs changed since the
+    # previous run, not whether the files were modified since
+    deps = interop_deps(header, filepath, incremental and not check)
+    manifest = output_manifest(filepath)
+    sink = output_sink(backup, io_threads, manifest = manifest, stale = stale)
+    emitter = None
+    try:
+        # libcef.g.cs
+        writect += update_output(deps, deps.get_funcs_inputs(header.get_funcs()), project_props_compile_items, filepath + '/' + schema.libcef_path, schema.libcef_filename, lambda: make_libcef_file(header), sink)
+
+        # structs, wrappers and impl templates (the only files that use the
+        # header comments) of each header file; in streaming mode the classes of
+        # a header file are only loaded while its files are generated
+        if jobs > 1 and not header.streaming and class_emitter.is_supported():
+            emitter = class_emitter(header, jobs)
+        class_outputs = []
+        for classes in header.iter_file_classes():
+            for cls in classes:
+                class_outputs.append((cls, 'struct', project_props_compile_items, filepath + '/' + schema.struct_path, cls.get_capi_name() + ".g.cs"))
+
+            for cls in classes:
+                class_outputs.append((cls, 'wrapper', project_props_compile_items, filepath + '/' + schema.wrapper_g_path, schema.cpp2csname(cls.get_name()) + ".g.cs"))
+
+            if templates:
+                for cls in classes:
+                    tmplpath = schema.handler_tmpl_path
+                    if schema.is_proxy(cls):
+                        tmplpath = schema.proxy_tmpl_path
+                    class_outputs.append((cls, 'tmpl', template_items, templatedir + '/' + tmplpath, schema.cpp2csname(cls.get_name()) + ".tmpl.g.cs"))
+
+            if header.streaming:
+                writect += update_class_outputs(deps, class_outputs, None, sink)
+                class_outputs = []
+                clear_layout_caches()
+
+        writect += update_class_outputs(deps, class_outputs, emitter, sink)
+
+        # userdata
+        userdatacls = obj_class(header, 'CefUserData', '', 'CefUserData', 'CefBaseRefCounted', '', '', '', [])
+        writect += update_output(deps, deps.get_class_inputs(userdatacls), project_props_compile_items, filepath + '/' + schema.struct_path, userdatacls.get_capi_name() + ".g.cs", lambda: make_struct_file(userdatacls), sink)
+        writect += update_output(deps, deps.get_class_inputs(userdatacls), project_props_compile_items, filepath + '/' + schema.wrapper_g_path, schema.cpp2csname(userdatacls.get_name()) + ".g.cs", lambda: make_wrapper_g_file(userdatacls), sink)
+
+        # process cef_version.h and cef_api_hash.h
+        version_files = {}
+        for name in ['cef_version.h', 'cef_api_hash.h']:
+            content = header.get_attached_file(name)
+            if content is None:
+                content = read_file(cppheaderdir + '/' + name)
+            version_files[name] = content
+        writect += update_output(deps, deps.get_files_inputs(version_files), project_props_compile_items, filepath + '/' + schema.libcef_path, schema.libcef_version_filename, lambda: make_version_cs(version_files['cef_version.h'], version_files['cef_api_hash.h']), sink)
+
+        # wait for the files written in the background
+        writect += sink.wait()
+    finally:
+        # stop the workers and threads if generating a file failed
+        if not emitter is None:
+            emitter.close()
+        sink.close()
+
+    if not check:
+        deps.save()
+
+    schema.report_unmapped_types()
+
+    # make project props file; it is not checked in, so it is not checked
+    if not check:
+        content = make_props_file(project_props_compile_items, filepath)
+        writect += update_file(None, filepath, project_props_filename, content, backup, manifest, stale)
+
+    if not outputs is None:
+        outputs['interop'] = project_props_compile_items + [filepath + '/' + project_props_filename]
+        outputs['templates'] = template_items
+
+    if not check:
+        manifest.save()
 
     return writect
 
 #
 # Generate "CefGlue.Generated.props" msbuild file.
 #
+project_props_filename = 'CefGlue.g.props'
+
 def make_props_file(filelist, basedir):
     document = getDOMImplementation().createDocument(None, None, None)
     documentElement = document.createElementNS(None, "Project")
@@ -937,27 +1454,192 @@ def make_props_file(filelist, basedir):
 #
 # Utils
 #
-def update_file(filelist, dir, filename, content, backup):
-    if not os.path.isdir(dir):
-        os.makedirs(dir)
+def update_output(deps, inputs, filelist, dir, filename, make_content, sink):
+    """ Generate the file with |make_content| and update it with the
+        output_sink |sink|, unless |deps| reports that its inputs are
+        unchanged. """
+    if deps.is_current(dir + "/" + filename, inputs):
+        sink.skip(filelist, dir, filename)
+        return 0
+    return sink.update(filelist, dir, filename, make_content())
+
+def update_class_outputs(deps, outputs, emitter, sink):
+    """ Generate and update the class files of |outputs|, a list of (class,
+        kind, filelist, dir, filename) tuples, in order. Files whose inputs
+        changed are generated by the class_emitter |emitter| or, if it is
+        None, in this process. """
+    current = []
+    jobs = []
+    for cls, kind, filelist, dir, filename in outputs:
+        is_current = deps.is_current(dir + "/" + filename, deps.get_class_inputs(cls))
+        current.append(is_current)
+        if not is_current:
+            jobs.append((cls, kind))
+
+    if emitter is None:
+        contents = [make_class_file(cls, kind) for cls, kind in jobs]
+    else:
+        contents = emitter.make_files(jobs)
 
-    sys.stdout.write(filename + "... ")
-    filename = dir + "/" + filename
+    writect = 0
+    contents = iter(contents)
+    for (cls, kind, filelist, dir, filename), is_current in zip(outputs, current):
+        if is_current:
+            sink.skip(filelist, dir, filename)
+        else:
+            writect += sink.update(filelist, dir, filename, next(contents))
+    return writect
 
+def update_file(filelist, dir, filename, content, backup, manifest = None, stale = None):
     if filelist is not None:
-        filelist.append(filename)
+        filelist.append(dir + "/" + filename)
 
-    if path_exists(filename):
-        oldcontent = read_file(filename)
+    result = write_output(dir, filename, content, backup, manifest, stale is not None)
+    sys.stdout.write(filename + get_update_status(result, stale is not None))
+    if result and stale is not None:
+        stale.append(dir + "/" + filename)
+    return result
+
+def get_update_status(result, check):
+    if not result:
+        return "... up-to-date.\n"
+    elif check:
+        return "... stale.\n"
+    return "... updated.\n"
+
+def write_output(dir, filename, content, backup, manifest = None, check = False):
+    """ Write |content| to the file unless it is unchanged. Returns 1 if the
+        file was written, or with |check| only compare it and return 1 if it
+        differs. If the output_manifest |manifest| has a current entry for the
+        file it is not read. """
+    filename = dir + "/" + filename
+
+    hash = None
+    oldhash = None
+    if manifest is not None:
+        hash = get_content_hash(content)
+        oldhash = manifest.get_hash(filename)
+
+    if oldhash is not None:
+        # the file exists and its contents are known
+        changed = oldhash != hash
+        exists = True
     else:
-        oldcontent = ''
+        if path_exists(filename):
+            oldcontent = read_file(filename)
+        else:
+            oldcontent = ''
+        changed = content != oldcontent
+        exists = oldcontent != ''
+
+    if check:
+        return 1 if changed else 0
 
-    if content != oldcontent:
-        if backup and oldcontent != '':
+    if changed:
+        if not os.path.isdir(dir):
+            os.makedirs(dir, exist_ok = True)
+        if backup and exists:
             backup_file(filename)
         write_file(filename, content)
-        sys.stdout.write("updated.\n")
-        return 1
 
-    sys.stdout.write("up-to-date.\n")
-    return 0
+    if manifest is not None:
+        manifest.record(filename, hash)
+    return 1 if changed else 0
+
+class output_sink:
+    """ Updates generated files. With |threads| greater than 0 the files are
+        compared and written by that many background threads, fed through a
+        bounded queue, while generation continues. The status messages are
+        written in the order the files were added. If |stale| is a list the
+        files are only compared and the paths of the files that differ are
+        appended to it. """
+
+    def __init__(self, backup, threads = 0, queue_size = 64, manifest = None, stale = None):
+        self.backup = backup
+        self.manifest = manifest
+        self.stale = stale
+        self.queue = queue.Queue(queue_size)
+        self.lock = threading.Lock()
+        # status messages of the completed files by sequence number
+        self.messages = {}
+        self.next_sequence = 0
+        self.next_message = 0
+        self.writect = 0
+        self.error = None
+        self.threads = []
+        for i in range(threads):
+            thread = threading.Thread(target = self.run)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def update(self, filelist, dir, filename, content):
+        """ Update a file. Returns 1 if the file was written synchronously;
+            files written in the background are counted by wait(). """
+        if len(self.threads) == 0:
+            return update_file(filelist, dir, filename, content, self.backup, self.manifest, self.stale)
+        if filelist is not None:
+            filelist.append(dir + "/" + filename)
+        # blocks while the queue is full
+        self.queue.put((self.get_sequence(), dir, filename, content))
+        return 0
+
+    def skip(self, filelist, dir, filename):
+        """ Keep a file whose inputs are unchanged. """
+        if filelist is not None:
+            filelist.append(dir + "/" + filename)
+        if self.manifest is not None:
+            self.manifest.keep(dir + "/" + filename)
+        self.report(self.get_sequence(), filename + "... inputs unchanged.\n")
+
+    def get_sequence(self):
+        sequence = self.next_sequence
+        self.next_sequence += 1
+        return sequence
+
+    def report(self, sequence, message):
+        """ Write the messages that are complete up to |sequence|. """
+        with self.lock:
+            self.messages[sequence] = message
+            while self.next_message in self.messages:
+                sys.stdout.write(self.messages.pop(self.next_message))
+                self.next_message += 1
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            sequence, dir, filename, content = item
+            message = ''
+            check = self.stale is not None
+            try:
+                result = write_output(dir, filename, content, self.backup, self.manifest, check)
+                message = filename + get_update_status(result, check)
+                if result:
+                    with self.lock:
+                        self.writect += 1
+                        if check:
+                            self.stale.append(dir + "/" + filename)
+            except Exception as e:
+                with self.lock:
+                    if self.error is None:
+                        self.error = e
+            self.report(sequence, message)
+
+    def wait(self):
+        """ Wait until all files are written and stop the threads. Returns the
+            number of files written in the background. """
+        self.close()
+        if not self.error is None:
+            raise self.error
+        return self.writect
+
+    def close(self):
+        """ Stop the threads after the queued files are written. Errors are
+            only raised by wait(). """
+        for thread in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
@@ -187,7 +187,19 @@ c2cs_enumtypes = {
 
 c2cs_structtypes = { }
 
-cs_keywords = [ 'object', 'string', 'checked', 'event', 'params', 'delegate' ]
+# combined c2cs_types, c2cs_enumtypes and c2cs_structtypes lookup table, built by load()
+c2cs_lookup = { }
+
+# resolved c2cs_type() results: C type -> (C# type, processed C type, mapped)
+c2cs_cache = { }
+
+# unmapped processed C types -> (list of C types, list of usages)
+c2cs_unmapped = { }
+
+cs_keywords = frozenset([ 'object', 'string', 'checked', 'event', 'params', 'delegate' ])
+
+# C++ class name -> C# class name, built by load()
+cs_names = { }
 
 classdef = { }
 
@@ -202,10 +214,20 @@ def load(schema_name, header):
 
     # build C API type name to C# type name map (struct types)
     c2cs_structtypes.clear();
+    cs_names.clear()
     for cls in header.get_classes():
         c2cs_structtypes[cls.get_capi_name()] = get_iname(cls)
+        cs_names[cls.get_name()] = make_csname(cls.get_name())
         # sys.stdout.write('struct _%s*' % cls.get_capi_name() + ' -> ' + '%s*' % cls.get_capi_name() + '\n' )
 
+    # build the combined lookup table; c2cs_types takes precedence over
+    # c2cs_enumtypes, which takes precedence over c2cs_structtypes
+    c2cs_lookup.clear()
+    for types in [c2cs_structtypes, c2cs_enumtypes, c2cs_types]:
+        c2cs_lookup.update(types)
+    c2cs_cache.clear()
+    c2cs_unmapped.clear()
+
     return
 
 
@@ -251,8 +273,25 @@ def quote_name(name):
         return '@' + name
     return name
 
-def c2cs_type(ctype):
-    warn_ctype = ctype
+def c2cs_type(ctype, usage = None):
+    """ Return the C# type for a C type. Results are cached; unmapped types are
+        recorded with |usage| and reported once by report_unmapped_types(). """
+    result = c2cs_cache.get(ctype)
+    if result is None:
+        result = resolve_c2cs_type(ctype)
+        c2cs_cache[ctype] = result
+
+    ret, processed, mapped = result
+    if not mapped:
+        ctypes, usages = c2cs_unmapped.setdefault(processed, ([], []))
+        if not ctype in ctypes:
+            ctypes.append(ctype)
+        if usage is not None and not usage in usages:
+            usages.append(usage)
+    return ret
+
+def resolve_c2cs_type(ctype):
+    """ Return (C# type, processed C type, mapped) for a C type. """
     ptrs = 0
     ret = ""
     ctype = ctype.strip()
@@ -275,43 +314,51 @@ def c2cs_type(ctype):
     if ctype.startswith('_'):
         ctype = ctype[1:].strip()
 
-    if ctype in c2cs_types:
-        ret = c2cs_types[ctype]
-    elif ctype in c2cs_enumtypes:
-        ret = c2cs_enumtypes[ctype]
-    elif ctype in c2cs_structtypes:
-        ret = c2cs_structtypes[ctype]
+    mapped = ctype in c2cs_lookup
+    if mapped:
+        ret = c2cs_lookup[ctype]
     else:
-        sys.stdout.write('Warning! C type "%s" is not mapped to C# type (processed to "%s").\n' % (warn_ctype, ctype))
         ret = ctype
 
-    while ptrs > 0:
-        ret += "*"
-        ptrs -= 1
-
-    #if ctype.endswith('*') and c2cs_types.has_key(ctype[:-1]):
-    #    return c2cs_types[ctype[:-1]] + '*'
-
-    #if c2cs_enumtypes.has_key(ctype):
-    #    return c2cs_enumtypes[ctype]
-
-    #if ctype.startswith('enum '):
-    #    if c2cs_enumtypes.has_key(ctype[5:]):
-    #        return c2cs_enumtypes[ctype[5:]]
-
-    #if c2cs_types.has_key(ctype):
-    #    return c2cs_types[ctype]
-
-    #if c2cs_structtypes.has_key(ctype):
-    #    return c2cs_structtypes[ctype]
+    return (ret + '*' * ptrs, ctype, mapped)
+
+def report_unmapped_types():
+    """ Write a warning for each C type that is not mapped to a C# type. """
+    for processed in sorted(c2cs_unmapped.keys()):
+        ctypes, usages = c2cs_unmapped[processed]
+        msg = 'Warning! C type "%s" is not mapped to C# type (processed to "%s").' % ('", "'.join(ctypes), processed)
+        if len(usages) > 0:
+            msg += ' Used by: %s.' % ', '.join(usages)
+        sys.stdout.write(msg + '\n')
+
+def pop_unmapped_types():
+    """ Return and clear the unmapped C types recorded by c2cs_type(). """
+    result = dict(c2cs_unmapped)
+    c2cs_unmapped.clear()
+    return result
 
-    # sys.stdout.write('%s -> %s.\n' % (warn_ctype, ret))
-    return ret
+def add_unmapped_types(unmapped):
+    """ Record the unmapped C types returned by pop_unmapped_types(), e.g. in
+        another process. """
+    for processed, (ctypes, usages) in unmapped.items():
+        current = c2cs_unmapped.setdefault(processed, ([], []))
+        for ctype in ctypes:
+            if not ctype in current[0]:
+                current[0].append(ctype)
+        for usage in usages:
+            if not usage in current[1]:
+                current[1].append(usage)
 
 def get_iname(cls):
     return cls.get_capi_name()
 
 def cpp2csname(cppname):
+    csname = cs_names.get(cppname)
+    if csname is None:
+        csname = make_csname(cppname)
+    return csname
+
+def make_csname(cppname):
     if cppname in classdef:
         if 'name' in classdef[cppname]:
             return classdef[cppname]['name']
@@ -0,0 +1,78 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import filecmp
+import os
+import subprocess
+import sys
+
+import pytest
+
+GEN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INCLUDE_DIR = os.path.join(GEN_DIR, 'include')
+CEFGLUE_DIR = os.path.join(os.path.dirname(GEN_DIR), 'CefGlue')
+# the headers that cefglue_interop_gen.py does not parse
+EXCLUDED_FILES = ['cef_application_mac.h', 'cef_version.h', 'cef_thread.h',
+                  'cef_waitable_event.h']
+
+# written by every run, with the paths of the output directory
+IGNORED_FILES = ['CefGlue.g.deps', 'CefGlue.g.manifest']
+
+sys.path.insert(0, GEN_DIR)
+
+
+def run_generator(args, cwd):
+    """ Run cefglue_interop_gen.py with |args| in |cwd|, where it writes the
+        implementation templates. Returns the completed process. """
+    return subprocess.run(
+        [sys.executable, '-B', os.path.join(GEN_DIR, 'cefglue_interop_gen.py'),
+         '--cpp-header-dir', INCLUDE_DIR] + args,
+        cwd=str(cwd), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+
+
+def parse_headers(*args, jobs=1):
+    """ Return the obj_header of the bundled headers, created with |args| and
+        scanned by |jobs| worker processes. """
+    from cef_parser import obj_header
+    header = obj_header(*args)
+    header.add_directory(INCLUDE_DIR, EXCLUDED_FILES, jobs)
+    for name in ['cef_version.h', 'cef_api_hash.h']:
+        header.attach_file(os.path.join(INCLUDE_DIR, name))
+    return header
+
+
+def assert_same_outputs(first, second):
+    """ Assert that the output directories contain the same files. """
+    compare = filecmp.dircmp(first, second, ignore=IGNORED_FILES)
+    assert compare.left_only == [] and compare.right_only == []
+    count = 0
+    for dirpath, dirnames, filenames in os.walk(first):
+        for filename in filenames:
+            if filename in IGNORED_FILES:
+                continue
+            path = os.path.join(dirpath, filename)
+            other = os.path.join(second, os.path.relpath(path, first))
+            assert filecmp.cmp(path, other, shallow=False), path
+            count += 1
+    assert count > 250
+
+
+@pytest.fixture
+def generator(tmp_path):
+    """ Run the generator in a temporary directory. """
+    return lambda *args: run_generator(list(args), tmp_path)
+
+
+@pytest.fixture(scope='session')
+def serial_outputs(tmp_path_factory):
+    """ Generate the interop files serially. Returns the output directory and
+        the header model. """
+    tmp_path = tmp_path_factory.mktemp('serial')
+    out = str(tmp_path / 'out')
+    model = str(tmp_path / 'model.json')
+    result = run_generator(['--cefglue-dir', out, '--no-backup',
+                            '--no-templates', '--export-model', model],
+                           tmp_path)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return out, model
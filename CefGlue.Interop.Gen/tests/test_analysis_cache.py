@@ -0,0 +1,68 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import pytest
+
+from conftest import parse_headers
+from cef_parser import obj_analysis, obj_analysis_cache
+
+FIELDS = ['value', 'result_type', 'result_value', 'result_default',
+          'ptr_type', 'isconst', 'type', 'isbyref', 'isbyaddr']
+
+
+@pytest.fixture(scope='module')
+def header():
+    return parse_headers(False, False)
+
+
+def test_shared_results(header):
+    cache = obj_analysis_cache()
+    result = cache.get([header], 'const CefString&', False)
+    assert cache.get([header], ' const  CefString& ', False) is result
+    assert cache.get([header.get_class('CefBrowser'), header],
+                     'const CefString&', False) is result
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert cache.get_hit_rate() == pytest.approx(2.0 / 3)
+
+
+def test_named_results(header):
+    cache = obj_analysis_cache()
+    named = cache.get([header], 'CefRefPtr<CefBrowser> browser')
+    assert named.get_name() == 'browser'
+    assert named.get_value() == 'CefRefPtr<CefBrowser> browser'
+    assert named.get_ptr_type() == 'CefBrowser'
+    # the shared result is not modified
+    assert cache.get([header], 'CefRefPtr<CefBrowser>', False).get_name() is None
+
+
+def test_scoped_results(header):
+    cls = header.get_class('CefCommandLine')
+    cache = obj_analysis_cache()
+    result = cache.get([cls, header], 'ArgumentList&', False)
+    assert result.is_result_vector() and result.scoped
+    assert cache.get([cls, header], 'ArgumentList&', False) is result
+    assert cache.misses == 1
+
+    cache.release_scopes([cls])
+    assert cache.get([cls, header], 'ArgumentList&', False) is not result
+    assert cache.misses == 2
+
+
+def test_same_as_analysis(header):
+    # every argument analysis equals an uncached one
+    count = 0
+    for cls in header.get_classes():
+        for func in cls.get_virtual_funcs() + cls.get_static_funcs():
+            for arg in [func.get_retval()] + func.get_arguments():
+                cached = arg.get_type()
+                if cached.get_name() is None:
+                    continue
+                value = cached.get_value()
+                fresh = obj_analysis([cls, header], value, True)
+                assert cached.get_name() == fresh.get_name()
+                for field in FIELDS:
+                    assert getattr(cached, field) == getattr(fresh, field), \
+                        (value, field)
+                count += 1
+    assert count > 1000
+    assert header.get_analysis_cache().get_hit_rate() > 0.5
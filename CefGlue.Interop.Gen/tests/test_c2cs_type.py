@@ -0,0 +1,81 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import pytest
+
+import schema
+from conftest import parse_headers
+
+
+def reference_c2cs_type(ctype):
+    """ The string processing and lookup order that c2cs_type() replaces. """
+    ptrs = 0
+    ctype = ctype.strip()
+    while schema.isref(ctype):
+        ptrs += 1
+        ctype = ctype[:-1].strip()
+        if ctype.endswith('const'):
+            ctype = ctype[:-5].strip()
+    for prefix in ['const', 'struct', 'enum', '_']:
+        if ctype.startswith(prefix):
+            ctype = ctype[len(prefix):].strip()
+    for types in [schema.c2cs_types, schema.c2cs_enumtypes,
+                  schema.c2cs_structtypes]:
+        if ctype in types:
+            return types[ctype] + '*' * ptrs
+    return ctype + '*' * ptrs
+
+
+@pytest.fixture
+def header():
+    header = parse_headers(False, False)
+    schema.load('cef3', header)
+    yield header
+    schema.pop_unmapped_types()
+
+
+def test_same_as_reference(header):
+    ctypes = set()
+    for func in header.get_funcs():
+        parts = func.get_capi_parts()
+        ctypes.add(parts['retval'])
+        ctypes.update(x[:x.rindex(' ')] for x in parts['args'] if x != 'void')
+    for cls in header.get_classes():
+        for func in cls.get_virtual_funcs() + cls.get_static_funcs():
+            parts = func.get_capi_parts()
+            ctypes.add(parts['retval'])
+            ctypes.update(x[:x.rindex(' ')] for x in parts['args']
+                          if x != 'void')
+    assert len(ctypes) > 100
+    for ctype in ctypes:
+        assert schema.c2cs_type(ctype) == reference_c2cs_type(ctype), ctype
+
+
+def test_cached(header):
+    assert schema.c2cs_type('const struct _cef_browser_t*') == 'cef_browser_t*'
+    assert schema.c2cs_cache['const struct _cef_browser_t*'] == \
+        ('cef_browser_t*', 'cef_browser_t', True)
+    schema.load('cef3', header)
+    assert schema.c2cs_cache == {}
+
+
+def test_unmapped_reported_once(header, capsys):
+    schema.c2cs_type('struct _cef_unknown_t*', 'CefFirst')
+    schema.c2cs_type('const struct _cef_unknown_t*', 'CefSecond')
+    assert schema.c2cs_type('struct _cef_unknown_t*', 'CefFirst') == \
+        'cef_unknown_t*'
+    schema.report_unmapped_types()
+    assert capsys.readouterr().out == \
+        'Warning! C type "struct _cef_unknown_t*", ' \
+        '"const struct _cef_unknown_t*" is not mapped to C# type ' \
+        '(processed to "cef_unknown_t"). Used by: CefFirst, CefSecond.\n'
+
+
+def test_unmapped_from_workers(header):
+    schema.c2cs_type('cef_unknown_t', 'CefFirst')
+    unmapped = schema.pop_unmapped_types()
+    assert schema.c2cs_unmapped == {}
+    schema.c2cs_type('cef_unknown_t', 'CefSecond')
+    schema.add_unmapped_types(unmapped)
+    assert schema.c2cs_unmapped == {
+        'cef_unknown_t': (['cef_unknown_t'], ['CefSecond', 'CefFirst'])}
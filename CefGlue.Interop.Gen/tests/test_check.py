@@ -0,0 +1,60 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import os
+import shutil
+
+from conftest import CEFGLUE_DIR
+
+
+def copy_cefglue(tmp_path):
+    target = str(tmp_path / 'CefGlue')
+    shutil.copytree(CEFGLUE_DIR, target,
+                    ignore=shutil.ignore_patterns('bin', 'obj'))
+    return target
+
+
+def test_check_pristine_tree(generator):
+    result = generator('--cefglue-dir', CEFGLUE_DIR, '--check', '-q')
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert not 'Stale files:' in result.stdout
+
+
+def test_check_does_not_write(generator, tmp_path):
+    cefglue = copy_cefglue(tmp_path)
+    result = generator('--cefglue-dir', cefglue, '--check')
+    assert result.returncode == 0, result.stdout + result.stderr
+    for name in ['CefGlue.g.props', 'CefGlue.g.manifest', 'CefGlue.g.deps',
+                 'Classes.Handlers.tmpl', 'Classes.Proxies.tmpl']:
+        assert not os.path.exists(os.path.join(cefglue, name))
+        assert not os.path.exists(str(tmp_path / name))
+
+
+def test_check_reports_modified_file(generator, tmp_path):
+    cefglue = copy_cefglue(tmp_path)
+    path = os.path.join(cefglue, 'Classes.g', 'CefApp.g.cs')
+    with open(path, 'a') as f:
+        f.write('// local edit\n')
+    result = generator('--cefglue-dir', cefglue, '--check', '-q')
+    assert result.returncode == 1
+    assert 'Stale files:\n  ' + os.path.normpath(path) + '\n' in result.stdout
+
+
+def test_check_rejects_other_outputs(generator, tmp_path):
+    result = generator('--cefglue-dir', CEFGLUE_DIR, '--check',
+                       '--export-model', str(tmp_path / 'model.json'))
+    assert result.returncode == 2
+    assert not os.path.exists(str(tmp_path / 'model.json'))
+
+
+def test_check_from_generation_cache(generator, tmp_path):
+    cefglue = copy_cefglue(tmp_path)
+    cachedir = str(tmp_path / 'cache')
+    result = generator('--cefglue-dir', cefglue, '--no-backup',
+                       '--no-templates', '--cache-dir', cachedir)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    result = generator('--cefglue-dir', CEFGLUE_DIR, '--check',
+                       '--cache-dir', cachedir)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'Using cached output set' in result.stdout
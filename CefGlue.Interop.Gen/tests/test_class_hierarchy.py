@@ -0,0 +1,87 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import pytest
+
+from conftest import parse_headers
+from cef_parser import obj_header
+
+CLASS = """
+///
+/// Class %(name)s.
+///
+/*--cef(source=library)--*/
+class %(name)s : public %(parent)s {};
+"""
+
+
+def make_header(classes):
+    header = obj_header()
+    header.add_data('cef_classes.h', ''.join(
+        CLASS % {'name': name, 'parent': parent} for name, parent in classes))
+    return header
+
+
+def walk_parents(header, cls):
+    """ Return the ancestors of |cls| by walking the parent chain. """
+    result = []
+    name = cls.get_parent_name()
+    while True:
+        result.append(name)
+        parent = header.get_class(name)
+        if parent is None:
+            return result
+        name = parent.get_parent_name()
+
+
+def test_bundled_headers():
+    header = parse_headers(False, False)
+    for cls in header.get_classes():
+        ancestors = walk_parents(header, cls)
+        assert cls.get_ancestors() == ancestors
+        assert cls.get_depth() == len(ancestors)
+        assert cls.get_base_class_name() == ancestors[-1]
+        for name in ancestors:
+            assert cls.has_parent(name)
+        assert not cls.has_parent(cls.get_name())
+    assert header.get_class_hierarchy().get_undefined_parents() == {}
+
+    cls = header.get_class('CefRequestContext')
+    assert cls.get_ancestors() == ['CefPreferenceManager', 'CefBaseRefCounted']
+    assert header.get_base_class_name('CefRequestContext') == \
+        'CefBaseRefCounted'
+
+
+def test_undefined_parents():
+    header = make_header([('CefFirst', 'CefBaseScoped'),
+                          ('CefSecond', 'CefFirst'),
+                          ('CefThird', 'CefUnknown'),
+                          ('CefFourth', 'CefThird')])
+    hierarchy = header.get_class_hierarchy()
+    assert hierarchy.get_undefined_parents() == {'CefThird': 'CefUnknown'}
+
+    second = header.get_class('CefSecond')
+    assert second.get_ancestors() == ['CefFirst', 'CefBaseScoped']
+    assert second.get_base_class_name() == 'CefBaseScoped'
+    assert second.has_parent('CefFirst')
+
+    fourth = header.get_class('CefFourth')
+    assert fourth.get_ancestors() == ['CefThird', 'CefUnknown']
+    assert fourth.get_base_class_name() is None
+    assert fourth.get_depth() == 2
+
+
+def test_added_classes():
+    # the hierarchy is computed again when classes are added
+    header = make_header([('CefFirst', 'CefBaseRefCounted')])
+    assert header.get_class_hierarchy().get_depth('CefFirst') == 1
+    header.add_data('cef_second.h', CLASS % {'name': 'CefSecond',
+                                             'parent': 'CefFirst'})
+    assert header.get_class('CefSecond').get_depth() == 2
+
+
+def test_circular_inheritance():
+    header = make_header([('CefFirst', 'CefSecond'),
+                          ('CefSecond', 'CefFirst')])
+    with pytest.raises(Exception, match='Circular inheritance'):
+        header.get_class_hierarchy()
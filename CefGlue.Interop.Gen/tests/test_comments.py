@@ -0,0 +1,59 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+from cef_parser import get_comment, get_comment_index, lookup_comment
+
+DATA = """
+///
+/// Returns the first value. See also GetSecond().
+///
+/*--cef()--*/
+int GetFirst();
+
+///
+/// Returns the second value.
+///
+/*--cef(optional_param=value,
+        default_retval=0)--*/
+int GetSecond(int value);
+
+// Not a documentation comment.
+int GetThird();
+
+///
+/// Separated by an empty line.
+///
+
+int GetFourth();
+"""
+
+
+def lookup(name):
+    index = get_comment_index(DATA)
+    return lookup_comment(DATA, index, DATA.index('int ' + name))
+
+
+def test_index():
+    index = get_comment_index(DATA)
+    assert sorted(index.keys()) == [DATA.index('int GetFirst'),
+                                    DATA.index('int GetSecond')]
+    assert lookup('GetFirst') == get_comment(DATA, 'int GetFirst') == \
+        ['', ' Returns the first value. See also GetSecond().', '']
+
+
+def test_block_attributes():
+    # multi line /*--cef()--*/ comments are skipped like single line ones
+    assert lookup('GetSecond') == ['', ' Returns the second value.', '']
+
+
+def test_first_occurrence():
+    # get_comment() stops at the first occurrence of the name, which is in the
+    # comment of GetFirst(), and returns the lines above it
+    assert get_comment(DATA, 'GetSecond(') == ['']
+    assert lookup('GetSecond') == get_comment(DATA, 'int GetSecond(')
+
+
+def test_missing_comments():
+    assert lookup('GetThird') == []
+    assert lookup('GetFourth') == []
+    assert lookup_comment(DATA, None, DATA.index('int GetFirst')) == []
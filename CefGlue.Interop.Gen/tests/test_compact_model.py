@@ -0,0 +1,54 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import pytest
+
+from conftest import parse_headers
+from cef_parser import get_attrib_dict
+
+
+@pytest.fixture(scope='module')
+def header():
+    return parse_headers(False, False)
+
+
+def test_attrib_dict():
+    attribs = get_attrib_dict('optional_param=a,optional_param=b,capi_name=x')
+    assert attribs == {'optional_param': ('a', 'b'), 'capi_name': 'x'}
+    assert get_attrib_dict('optional_param=a,optional_param=b,capi_name=x') \
+        is attribs
+    with pytest.raises(TypeError):
+        attribs['capi_name'] = 'y'
+
+
+def test_attrib_list(header):
+    func = header.get_class('CefAuthCallback').get_virtual_funcs()[0]
+    assert func.get_name() == 'Continue'
+    assert func.get_attrib_list('optional_param') == ['username', 'password']
+    assert isinstance(func.get_attrib_list('optional_param'), list)
+
+
+def test_slots(header):
+    cls = header.get_class('CefBrowser')
+    func = cls.get_virtual_funcs()[0]
+    for obj in [cls, func, func.get_retval(), func.get_retval().get_type(),
+                header.get_typedefs()[0]]:
+        assert not hasattr(obj, '__dict__'), type(obj).__name__
+
+
+def test_interned_names(header):
+    # names parsed from different headers are the same object
+    parents = [x.get_parent_name() for x in header.get_classes()
+               if x.get_parent_name() == 'CefBaseRefCounted']
+    assert len(parents) > 1
+    assert all(x is parents[0] for x in parents)
+
+    names = []
+    for cls in [header.get_class('CefLoadHandler'),
+                header.get_class('CefLifeSpanHandler')]:
+        for func in cls.get_virtual_funcs():
+            for arg in func.get_arguments():
+                if arg.get_name() == 'browser':
+                    names.append(arg.get_name())
+    assert len(names) > 1
+    assert all(x is names[0] for x in names)
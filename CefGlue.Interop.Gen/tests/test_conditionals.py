@@ -0,0 +1,96 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import pytest
+
+from cef_parser import evaluate_conditionals, get_header_defines
+
+PLATFORM_BLOCKS = """#if defined(OS_WIN)
+windows
+#elif defined(OS_MAC)
+mac
+#else
+other
+#endif"""
+
+
+def lines(data):
+    """ Return the non-empty lines of |data|. """
+    return [line for line in data.split('\n') if line != '']
+
+
+@pytest.mark.parametrize('platform, expected', [
+    ('windows', ['#if defined(OS_WIN)', 'windows', '#elif defined(OS_MAC)',
+                 '#else', '#endif']),
+    ('mac', ['#if defined(OS_WIN)', '#elif defined(OS_MAC)', 'mac', '#else',
+             '#endif']),
+    ('linux', ['#if defined(OS_WIN)', '#elif defined(OS_MAC)', '#else',
+               'other', '#endif']),
+])
+def test_platform_blocks(platform, expected):
+    result = evaluate_conditionals(PLATFORM_BLOCKS, platform)
+    assert lines(result) == expected
+
+
+def test_line_numbers_are_kept():
+    result = evaluate_conditionals(PLATFORM_BLOCKS, 'mac')
+    assert len(result.split('\n')) == len(PLATFORM_BLOCKS.split('\n'))
+    assert result.split('\n')[3] == 'mac'
+
+
+def test_ifdef_and_ifndef():
+    data = '#ifdef OS_POSIX\nposix\n#endif\n#ifndef OS_WIN // comment\nnot windows\n#endif'
+    assert 'posix' in lines(evaluate_conditionals(data, 'linux'))
+    assert 'not windows' in lines(evaluate_conditionals(data, 'linux'))
+    assert not 'posix' in lines(evaluate_conditionals(data, 'windows'))
+    assert not 'not windows' in lines(evaluate_conditionals(data, 'windows'))
+
+
+def test_expressions():
+    data = '#if defined(OS_POSIX) && !defined(OS_MAC)\nlinux\n#endif'
+    assert 'linux' in lines(evaluate_conditionals(data, 'linux'))
+    assert not 'linux' in lines(evaluate_conditionals(data, 'mac'))
+    assert not 'linux' in lines(evaluate_conditionals(data, 'windows'))
+
+
+def test_unknown_macros_are_kept():
+    data = '#if defined(USING_CHROMIUM)\nchromium\n#else\ncef\n#endif'
+    assert evaluate_conditionals(data, 'windows') == data
+
+
+def test_unknown_macros_combined_with_platform():
+    data = '#if defined(OS_WIN) && defined(FOO)\nwin_foo\n#endif\n' \
+           '#if defined(OS_WIN) || defined(FOO)\nwin_or_foo\n#endif'
+    # false && FOO is false, false || FOO depends on FOO
+    assert lines(evaluate_conditionals(data, 'linux')) == \
+        ['#if defined(OS_WIN) && defined(FOO)', '#endif',
+         '#if defined(OS_WIN) || defined(FOO)', 'win_or_foo', '#endif']
+    # true && FOO depends on FOO, true || FOO is true
+    assert evaluate_conditionals(data, 'windows') == data
+
+
+def test_nested_blocks():
+    data = '#if defined(OS_WIN)\n#if defined(FOO)\nfoo\n#else\nbar\n#endif\n' \
+           '#endif\nafter'
+    assert lines(evaluate_conditionals(data, 'linux')) == \
+        ['#if defined(OS_WIN)', '#endif', 'after']
+    assert evaluate_conditionals(data, 'windows') == data
+
+
+def test_unbalanced_directives_are_kept():
+    data = '#endif\ntext'
+    assert evaluate_conditionals(data, 'linux') == data
+
+
+def test_unknown_platform():
+    with pytest.raises(Exception):
+        evaluate_conditionals(PLATFORM_BLOCKS, 'android')
+
+
+def test_header_defines():
+    data = '#if defined(OS_WIN)\n#define CEF_CALLBACK __stdcall\n#else\n' \
+           '#define CEF_CALLBACK\n#endif\n#define CEF_EXPORT'
+    assert get_header_defines(data, 'windows') == \
+        {'CEF_CALLBACK': '__stdcall', 'CEF_EXPORT': ''}
+    assert get_header_defines(data, 'linux') == \
+        {'CEF_CALLBACK': '', 'CEF_EXPORT': ''}
@@ -0,0 +1,84 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import filecmp
+import os
+
+from make_interop import generation_cache
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(str(path)), exist_ok=True)
+    with open(str(path), 'w') as f:
+        f.write(content)
+
+
+def test_key(tmp_path):
+    headers = tmp_path / 'include'
+    write(headers / 'cef_app.h', 'class CefApp {};\n')
+    cache = generation_cache(str(tmp_path / 'cache'))
+
+    key = cache.get_key(str(headers), 'platform=None')
+    assert cache.get_key(str(headers), 'platform=None') == key
+    assert cache.get_key(str(headers), 'platform=linux') != key
+
+    write(headers / 'internal' / 'cef_types.h', '\n')
+    assert cache.get_key(str(headers), 'platform=None') != key
+
+
+def test_store_and_load(tmp_path):
+    out = tmp_path / 'out'
+    write(out / 'Classes.g' / 'CefApp.g.cs', 'app\n')
+    write(out / 'CefGlue.g.props', 'props\n')
+    cache = generation_cache(str(tmp_path / 'cache'))
+
+    assert cache.load('key') is None
+    cache.store('key', {'interop': str(out)},
+                {'interop': [str(out / 'Classes.g' / 'CefApp.g.cs'),
+                             str(out / 'CefGlue.g.props')]})
+    assert cache.load('key') == {
+        'interop': {'Classes.g/CefApp.g.cs': 'app\n',
+                    'CefGlue.g.props': 'props\n'}}
+    assert cache.load('other') is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_damaged_entry_is_a_miss(tmp_path):
+    cache = generation_cache(str(tmp_path))
+    write(cache.get_path('key'), '{"version":')
+    assert cache.load('key') is None
+    assert cache.misses == 1
+
+
+def test_generate_from_cache(generator, tmp_path):
+    cachedir = str(tmp_path / 'cache')
+    first = str(tmp_path / 'first')
+    second = str(tmp_path / 'second')
+
+    result = generator('--cefglue-dir', first, '--no-backup', '--no-templates',
+                       '--cache-dir', cachedir)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert not 'Using cached output set' in result.stdout
+
+    result = generator('--cefglue-dir', second, '--no-backup', '--no-templates',
+                       '--cache-dir', cachedir)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'Using cached output set' in result.stdout
+
+    compare = filecmp.dircmp(first, second,
+                             ignore=['CefGlue.g.deps', 'CefGlue.g.manifest'])
+    assert compare.left_only == [] and compare.right_only == []
+    for dirpath, dirnames, filenames in os.walk(first):
+        for filename in filenames:
+            if filename in ['CefGlue.g.deps', 'CefGlue.g.manifest']:
+                continue
+            path = os.path.join(dirpath, filename)
+            other = os.path.join(second, os.path.relpath(path, first))
+            assert filecmp.cmp(path, other, shallow=False), path
+
+
+def test_incremental_is_rejected(generator, tmp_path):
+    result = generator('--cefglue-dir', str(tmp_path / 'out'), '--incremental',
+                       '--cache-dir', str(tmp_path / 'cache'))
+    assert result.returncode == 2
+    assert not os.path.exists(str(tmp_path / 'out'))
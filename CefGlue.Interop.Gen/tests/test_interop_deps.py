@@ -0,0 +1,108 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import os
+import shutil
+
+import pytest
+
+from conftest import INCLUDE_DIR
+
+UNCHANGED = 'inputs unchanged.'
+
+
+def get_statuses(output):
+    """ Return a dict of the generated file names and their status. """
+    result = {}
+    for line in output.split('\n'):
+        parts = line.split('... ', 1)
+        if len(parts) == 2 and parts[0].endswith('.cs'):
+            result[parts[0]] = parts[1]
+    return result
+
+
+@pytest.fixture
+def incremental(generator, tmp_path):
+    """ Copy the bundled headers and generate from them incrementally. Returns
+        a function that runs the generator again and returns the statuses. """
+    headers = str(tmp_path / 'include')
+    shutil.copytree(INCLUDE_DIR, headers)
+    out = str(tmp_path / 'out')
+
+    def run(*args):
+        result = generator('--cpp-header-dir', headers, '--cefglue-dir', out,
+                           '--no-backup', '--no-templates', *args)
+        assert result.returncode == 0, result.stdout + result.stderr
+        return get_statuses(result.stdout)
+
+    statuses = run('--incremental')
+    assert len(statuses) > 250 and not UNCHANGED in statuses.values()
+    assert os.path.exists(os.path.join(out, 'CefGlue.g.deps'))
+    run.headers = headers
+    run.out = out
+    return run
+
+
+def test_unchanged_inputs(incremental):
+    statuses = incremental('--incremental')
+    assert set(statuses.values()) == set([UNCHANGED])
+
+
+def test_changed_header(incremental):
+    path = os.path.join(incremental.headers, 'cef_app.h')
+    with open(path) as f:
+        data = f.read()
+    with open(path, 'w') as f:
+        f.write(data.replace('// Implement this interface',
+                             '// Implement this changed interface', 1))
+
+    statuses = incremental('--incremental')
+    assert statuses['cef_app_t.g.cs'] != UNCHANGED
+    assert statuses['CefApp.g.cs'] != UNCHANGED
+    assert statuses['cef_browser_t.g.cs'] == UNCHANGED
+    assert statuses['libcef.g.cs'] != UNCHANGED
+
+
+def test_removed_output(incremental):
+    os.remove(os.path.join(incremental.out, 'Classes.g', 'CefApp.g.cs'))
+    statuses = incremental('--incremental')
+    assert statuses['CefApp.g.cs'] != UNCHANGED
+    assert statuses['cef_app_t.g.cs'] == UNCHANGED
+
+
+def test_platform_change(incremental):
+    statuses = incremental('--incremental', '--platform', 'linux')
+    assert not UNCHANGED in statuses.values()
+
+
+def test_damaged_dependencies(incremental):
+    with open(os.path.join(incremental.out, 'CefGlue.g.deps'), 'w') as f:
+        f.write('{"version":')
+    statuses = incremental('--incremental')
+    assert not UNCHANGED in statuses.values()
+
+
+def test_full_run_ignores_dependencies(incremental):
+    statuses = incremental()
+    assert not UNCHANGED in statuses.values()
+
+
+def test_full_run_updates_dependencies(incremental):
+    path = os.path.join(incremental.headers, 'cef_app.h')
+    with open(path) as f:
+        data = f.read()
+    with open(path, 'w') as f:
+        f.write(data.replace('OnRegisterCustomSchemes(',
+                             'OnRegisterCustomSchemesX(', 1))
+    incremental()
+
+    # the headers of the previous incremental run
+    with open(path, 'w') as f:
+        f.write(data)
+    statuses = incremental('--incremental')
+    assert statuses['cef_app_t.g.cs'] != UNCHANGED
+    assert statuses['CefApp.g.cs'] != UNCHANGED
+    with open(os.path.join(incremental.out, 'Classes.g', 'CefApp.g.cs')) as f:
+        content = f.read()
+    assert 'on_register_custom_schemes_delegate' in content
+    assert not 'on_register_custom_schemes_x' in content
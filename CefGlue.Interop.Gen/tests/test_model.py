@@ -0,0 +1,88 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import filecmp
+import json
+import os
+
+import pytest
+
+from conftest import parse_headers
+from cef_parser import read_file, read_model
+
+
+@pytest.fixture(scope='module')
+def model_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('model') / 'model.json')
+    parse_headers(False, True, False, None, True).write_model(path)
+    return path
+
+
+def test_round_trip(model_path, tmp_path):
+    path = str(tmp_path / 'model.json')
+    read_model(model_path).write_model(path)
+    assert read_file(path) == read_file(model_path)
+
+
+def test_streaming_round_trip(model_path, tmp_path):
+    path = str(tmp_path / 'model.json')
+    read_model(model_path, streaming=True).write_model(path)
+    assert read_file(path) == read_file(model_path)
+
+
+def test_model_contents(model_path):
+    header = read_model(model_path)
+    names = [cls.get_name() for cls in header.get_classes()]
+    assert 'CefApp' in names and 'CefBrowserHost' in names
+    assert header.get_class('CefApp').get_parent_name() == 'CefBaseRefCounted'
+    assert len(header.get_funcs()) > 0
+    assert 'CEF_VERSION' in header.get_attached_file('cef_version.h')
+
+
+def test_declarations_kept_for_export_only(model_path):
+    assert parse_headers().file_decls == {}
+    assert len(parse_headers(False, True, False, None, True).file_decls) > 0
+
+
+def test_repeated_round_trip(model_path, tmp_path):
+    # a model read without an export request can be written again
+    first = str(tmp_path / 'first.json')
+    second = str(tmp_path / 'second.json')
+    read_model(model_path).write_model(first)
+    read_model(first).write_model(second)
+    assert read_file(second) == read_file(model_path)
+
+
+@pytest.mark.parametrize('key', ['format', 'version', 'parser_version'])
+def test_other_versions_are_rejected(model_path, tmp_path, key):
+    model = json.loads(read_file(model_path))
+    model[key] = 0
+    path = str(tmp_path / 'model.json')
+    with open(path, 'w') as f:
+        json.dump(model, f)
+    with pytest.raises(Exception):
+        read_model(path)
+
+
+def test_generate_from_model(generator, tmp_path):
+    model = str(tmp_path / 'model.json')
+    headers_out = str(tmp_path / 'headers')
+    model_out = str(tmp_path / 'model')
+
+    result = generator('--cefglue-dir', headers_out, '--no-backup',
+                       '--export-model', model)
+    assert result.returncode == 0, result.stdout + result.stderr
+    result = generator('--model', model, '--cefglue-dir', model_out,
+                       '--no-backup')
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    count = 0
+    for dirpath, dirnames, filenames in os.walk(headers_out):
+        for filename in filenames:
+            if filename in ['CefGlue.g.deps', 'CefGlue.g.manifest']:
+                continue
+            path = os.path.join(dirpath, filename)
+            other = os.path.join(model_out, os.path.relpath(path, headers_out))
+            assert filecmp.cmp(path, other, shallow=False), path
+            count += 1
+    assert count > 250
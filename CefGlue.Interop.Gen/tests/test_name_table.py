@@ -0,0 +1,54 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import json
+import os
+
+import pytest
+
+import schema
+from conftest import parse_headers
+from make_interop import make_name_table
+
+
+@pytest.mark.parametrize('args', [[], ['--streaming']],
+                         ids=['default', 'streaming'])
+def test_export_names(generator, tmp_path, args):
+    # the names only depend on the parsed headers and the schema
+    path = str(tmp_path / 'names.json')
+    result = generator('--export-names', path, *args)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert os.listdir(str(tmp_path)) == ['names.json']
+
+    with open(path) as f:
+        table = json.load(f)
+    assert sorted(table.keys()) == ['classes', 'cs_keywords', 'functions']
+    assert table['classes']['CefApp'] == {
+        'capi_name': 'cef_app_t', 'cs_name': 'CefApp', 'iname': 'cef_app_t'}
+    assert table['functions']['CefInitialize'] == {
+        'capi_name': 'cef_initialize', 'cs_name': 'initialize',
+        'cs_args': ['args', 'settings', 'application', 'windows_sandbox_info']}
+    names = table['functions']['CefApp::OnRegisterCustomSchemes']
+    assert names['capi_name'] == 'on_register_custom_schemes'
+    assert 'params' in table['cs_keywords']
+
+
+def test_same_as_with_generation(generator, tmp_path):
+    first = str(tmp_path / 'first.json')
+    second = str(tmp_path / 'second.json')
+    result = generator('--export-names', first)
+    assert result.returncode == 0, result.stdout + result.stderr
+    result = generator('--export-names', second, '--no-templates',
+                       '--cefglue-dir', str(tmp_path / 'out'))
+    assert result.returncode == 0, result.stdout + result.stderr
+    with open(first) as f, open(second) as g:
+        assert f.read() == g.read()
+
+
+def test_streaming():
+    header = parse_headers()
+    schema.load('cef3', header)
+    expected = make_name_table(header)
+    header = parse_headers(False, True, True)
+    schema.load('cef3', header)
+    assert make_name_table(header) == expected
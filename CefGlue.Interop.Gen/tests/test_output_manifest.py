@@ -0,0 +1,118 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import os
+
+from make_interop import get_content_hash, manifest_filename, \
+    output_manifest, write_output
+
+SECOND = 1000000000
+
+
+def write(path, content):
+    with open(str(path), 'w') as f:
+        f.write(content)
+
+
+def read(path):
+    with open(str(path)) as f:
+        return f.read()
+
+
+def set_mtime(path, mtime_ns):
+    os.utime(str(path), ns=(mtime_ns, mtime_ns))
+
+
+def make_manifest(tmp_path, name, content, manifest_delay):
+    """ Write the file |name| through an output_manifest and save it with a
+        modification time |manifest_delay| nanoseconds after the file's.
+        Returns the modification time of the file. """
+    manifest = output_manifest(str(tmp_path))
+    write_output(str(tmp_path), name, content, False, manifest)
+    manifest.save()
+    mtime = os.stat(str(tmp_path / name)).st_mtime_ns
+    set_mtime(tmp_path / manifest_filename, mtime + manifest_delay)
+    return mtime
+
+
+def edit_in_place(path, content, mtime):
+    """ Change the contents of |path| without changing its size and
+        modification time. """
+    assert len(content) == len(read(path))
+    write(path, content)
+    set_mtime(path, mtime)
+
+
+def test_current_entry(tmp_path):
+    make_manifest(tmp_path, 'a.g.cs', 'old\n', SECOND)
+    manifest = output_manifest(str(tmp_path))
+    assert manifest.get_hash(str(tmp_path / 'a.g.cs')) == \
+        get_content_hash('old\n')
+    # the path is normalized
+    assert manifest.get_hash(str(tmp_path) + '/./a.g.cs') == \
+        get_content_hash('old\n')
+
+
+def test_changed_file(tmp_path):
+    make_manifest(tmp_path, 'a.g.cs', 'old\n', SECOND)
+    write(tmp_path / 'a.g.cs', 'changed\n')
+    assert output_manifest(str(tmp_path)).get_hash(str(tmp_path / 'a.g.cs')) \
+        is None
+    os.remove(str(tmp_path / 'a.g.cs'))
+    assert output_manifest(str(tmp_path)).get_hash(str(tmp_path / 'a.g.cs')) \
+        is None
+
+
+def test_trusted_entry_is_not_read(tmp_path):
+    mtime = make_manifest(tmp_path, 'a.g.cs', 'old\n', SECOND)
+    # an edit that the manifest cannot detect
+    edit_in_place(tmp_path / 'a.g.cs', 'new\n', mtime)
+
+    manifest = output_manifest(str(tmp_path))
+    assert write_output(str(tmp_path), 'a.g.cs', 'old\n', False, manifest) == 0
+    assert read(tmp_path / 'a.g.cs') == 'new\n'
+
+
+def test_racy_entry_is_read(tmp_path):
+    # the file was modified in the same timestamp as the manifest
+    mtime = make_manifest(tmp_path, 'a.g.cs', 'old\n', 0)
+    edit_in_place(tmp_path / 'a.g.cs', 'new\n', mtime)
+
+    manifest = output_manifest(str(tmp_path))
+    assert manifest.get_hash(str(tmp_path / 'a.g.cs')) is None
+    assert write_output(str(tmp_path), 'a.g.cs', 'old\n', False, manifest) == 1
+    assert read(tmp_path / 'a.g.cs') == 'old\n'
+
+
+def test_check_with_racy_entry(tmp_path):
+    mtime = make_manifest(tmp_path, 'a.g.cs', 'old\n', 0)
+    edit_in_place(tmp_path / 'a.g.cs', 'new\n', mtime)
+
+    manifest = output_manifest(str(tmp_path))
+    assert write_output(str(tmp_path), 'a.g.cs', 'old\n', False, manifest,
+                        True) == 1
+    assert read(tmp_path / 'a.g.cs') == 'new\n'
+
+
+def test_kept_entries(tmp_path):
+    manifest = output_manifest(str(tmp_path))
+    write_output(str(tmp_path), 'a.g.cs', 'a\n', False, manifest)
+    write_output(str(tmp_path), 'b.g.cs', 'b\n', False, manifest)
+    manifest.save()
+    assert len(output_manifest(str(tmp_path)).previous) == 2
+
+    # only the recorded and kept files are saved
+    manifest = output_manifest(str(tmp_path))
+    manifest.keep(str(tmp_path / 'b.g.cs'))
+    manifest.save()
+    previous = output_manifest(str(tmp_path)).previous
+    assert list(previous.keys()) == [os.path.normpath(str(tmp_path / 'b.g.cs'))]
+    assert previous[os.path.normpath(str(tmp_path / 'b.g.cs'))][0] == \
+        get_content_hash('b\n')
+
+
+def test_damaged_manifest(tmp_path):
+    make_manifest(tmp_path, 'a.g.cs', 'old\n', SECOND)
+    write(tmp_path / manifest_filename, '{"version":')
+    assert output_manifest(str(tmp_path)).get_hash(str(tmp_path / 'a.g.cs')) \
+        is None
@@ -0,0 +1,68 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import os
+
+import pytest
+
+from conftest import assert_same_outputs
+from make_interop import output_sink
+
+
+def update(sink, dir, count):
+    """ Add |count| files to |sink| and return the synchronous write count. """
+    files = []
+    writect = 0
+    for i in range(count):
+        writect += sink.update(files, dir, 'file%d.g.cs' % i, 'content %d\n' % i)
+    assert files == [dir + '/file%d.g.cs' % i for i in range(count)]
+    return writect
+
+
+@pytest.mark.parametrize('threads', [0, 2])
+def test_write_count(tmp_path, capsys, threads):
+    dir = str(tmp_path / 'out')
+    sink = output_sink(False, threads, queue_size=4)
+    writect = update(sink, dir, 20)
+    writect += sink.wait()
+    assert writect == 20
+    assert sorted(os.listdir(dir)) == sorted('file%d.g.cs' % i
+                                             for i in range(20))
+
+    # the messages are written in the order the files were added
+    assert capsys.readouterr().out == ''.join(
+        'file%d.g.cs... updated.\n' % i for i in range(20))
+
+    # unchanged files are not written again
+    sink = output_sink(False, threads)
+    writect = update(sink, dir, 20)
+    assert writect + sink.wait() == 0
+
+
+def test_check(tmp_path):
+    dir = str(tmp_path / 'out')
+    stale = []
+    sink = output_sink(False, 2, stale=stale)
+    update(sink, dir, 3)
+    assert sink.wait() == 3
+    assert sorted(stale) == [dir + '/file%d.g.cs' % i for i in range(3)]
+    assert not os.path.exists(dir)
+
+
+def test_error(tmp_path):
+    # a file where the output directory should be
+    path = tmp_path / 'out'
+    path.write_text('')
+    sink = output_sink(False, 2)
+    update(sink, str(path), 3)
+    with pytest.raises(Exception):
+        sink.wait()
+    assert sink.threads == []
+
+
+def test_io_threads(serial_outputs, generator, tmp_path):
+    out = str(tmp_path / 'out')
+    result = generator('--cefglue-dir', out, '--no-backup', '--no-templates',
+                       '--io-threads', '2')
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert_same_outputs(serial_outputs[0], out)
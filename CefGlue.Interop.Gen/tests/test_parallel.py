@@ -0,0 +1,52 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import subprocess
+import sys
+
+import pytest
+
+from conftest import GEN_DIR, INCLUDE_DIR, assert_same_outputs, parse_headers
+
+# generates the interop files from a header model with a start method
+WRITE_INTEROP = """
+import multiprocessing
+import sys
+sys.path.insert(0, sys.argv[1])
+from cef_parser import read_model
+from make_interop import write_interop
+
+if __name__ == '__main__':
+    multiprocessing.set_start_method(sys.argv[2])
+    header = read_model(sys.argv[3])
+    write_interop(header, sys.argv[4], False, 'cef3', sys.argv[5],
+                  templates=False, jobs=2)
+"""
+
+
+def test_parse_headers():
+    # the declarations are scanned in parallel and added in file order
+    args = (False, True, False, None, True)
+    assert parse_headers(*args, jobs=2).export_model() == \
+        parse_headers(*args).export_model()
+
+
+def test_class_files(serial_outputs, generator, tmp_path):
+    out = str(tmp_path / 'out')
+    result = generator('--cefglue-dir', out, '--no-backup', '--no-templates',
+                       '-j', '2')
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert_same_outputs(serial_outputs[0], out)
+
+
+@pytest.mark.parametrize('method', ['fork', 'spawn', 'forkserver'])
+def test_start_methods(serial_outputs, tmp_path, method):
+    # the classes are generated serially unless the workers are forked
+    out = str(tmp_path / 'out')
+    result = subprocess.run(
+        [sys.executable, '-B', '-c', WRITE_INTEROP, GEN_DIR, method,
+         serial_outputs[1], out, INCLUDE_DIR],
+        cwd=str(tmp_path), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert_same_outputs(serial_outputs[0], out)
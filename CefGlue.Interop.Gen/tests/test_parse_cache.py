@@ -0,0 +1,50 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import os
+
+from conftest import INCLUDE_DIR
+from cef_parser import obj_parse_cache, read_file, scan_header_data
+
+DATA = read_file(os.path.join(INCLUDE_DIR, 'cef_app.h'))
+
+
+def test_key(tmp_path):
+    cache = obj_parse_cache(str(tmp_path))
+    key = cache.get_key(DATA)
+    assert cache.get_key(DATA) == key
+    for other in [cache.get_key(DATA + '\n'),
+                  cache.get_key(DATA, legacy_parser=True),
+                  cache.get_key(DATA, with_comments=False),
+                  cache.get_key(DATA, platform='linux'),
+                  cache.get_key(DATA, skeleton=True)]:
+        assert other != key
+
+
+def test_key_includes_parser_source(tmp_path):
+    cache = obj_parse_cache(str(tmp_path))
+    key = cache.get_key(DATA)
+    cache.parser_hash = 'changed'
+    assert cache.get_key(DATA) != key
+
+
+def test_hit_and_miss(tmp_path):
+    cache = obj_parse_cache(str(tmp_path))
+    decls, hit = scan_header_data(DATA, cache=cache)
+    assert not hit
+    cached, hit = scan_header_data(DATA, cache=cache)
+    assert hit and cached == decls
+
+    # a changed parser does not use the entries of the previous one
+    cache = obj_parse_cache(str(tmp_path))
+    cache.parser_hash = 'changed'
+    decls, hit = scan_header_data(DATA, cache=cache)
+    assert not hit
+
+
+def test_damaged_entry(tmp_path):
+    cache = obj_parse_cache(str(tmp_path))
+    with open(cache.get_path(cache.get_key(DATA)), 'w') as f:
+        f.write('{"typedefs":')
+    decls, hit = scan_header_data(DATA, cache=cache)
+    assert not hit and len(decls['classes']) > 0
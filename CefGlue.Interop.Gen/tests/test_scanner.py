@@ -0,0 +1,44 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import glob
+import os
+
+import pytest
+
+from conftest import INCLUDE_DIR
+from cef_parser import read_file, scan_header, scan_header_regex
+
+HEADERS = sorted(glob.glob(os.path.join(INCLUDE_DIR, '*.h')))
+
+
+def read_header(path):
+    # as prepared by scan_header_data()
+    return read_file(path).replace('> >', '>>')
+
+
+@pytest.mark.parametrize('path', HEADERS, ids=os.path.basename)
+@pytest.mark.parametrize('with_comments', [True, False],
+                         ids=['comments', 'nocomments'])
+def test_scanner_matches_regex_parser(path, with_comments):
+    data = read_header(path)
+    assert scan_header(data, with_comments) == \
+        scan_header_regex(data, with_comments)
+
+
+@pytest.mark.parametrize('path', HEADERS, ids=os.path.basename)
+def test_skeleton_scan(path):
+    data = read_header(path)
+    full = scan_header(data)
+    skeleton = scan_header(data, skeleton=True)
+
+    assert [c[:3] for c in skeleton['classes']] == \
+        [c[:3] for c in full['classes']]
+    for attrib, name, parent_name, comment, members in skeleton['classes']:
+        assert comment is None and members is None
+    for key in ['typedefs', 'funcs', 'includes', 'forward_declares']:
+        assert skeleton[key] == full[key]
+
+
+def test_bundled_headers_found():
+    assert len(HEADERS) > 50
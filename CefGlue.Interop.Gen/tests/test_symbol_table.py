@@ -0,0 +1,67 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import pytest
+
+from conftest import parse_headers
+
+
+@pytest.fixture(scope='module')
+def header():
+    return parse_headers(False, False)
+
+
+def test_classes(header):
+    classes = header.get_classes()
+    for pos, cls in enumerate(classes):
+        assert header.get_class(cls.get_name()) is cls
+
+        # the C API names of the preceding classes
+        defined_structs = []
+        assert header.get_class(cls.get_name(), defined_structs) is cls
+        assert defined_structs == [x.get_capi_name() for x in classes[:pos]]
+
+    defined_structs = []
+    assert header.get_class('CefUnknown', defined_structs) is None
+    assert defined_structs == [x.get_capi_name() for x in classes]
+
+
+def test_files(header):
+    filenames = set(x.get_file_name() for x in header.get_classes())
+    filenames.update(x.get_file_name() for x in header.get_funcs())
+    for filename in filenames:
+        assert header.get_classes(filename) == \
+            [x for x in header.get_classes() if x.get_file_name() == filename]
+        assert header.get_funcs(filename) == \
+            [x for x in header.get_funcs() if x.get_file_name() == filename]
+    assert header.get_classes('cef_unknown.h') == []
+    assert header.get_funcs('cef_unknown.h') == []
+
+
+def test_aliases(header):
+    typedefs = header.get_typedefs()
+    assert len(typedefs) > 0
+    for typedef in typedefs:
+        # the first typedef of an alias
+        first = [x for x in typedefs if x.get_alias() == typedef.get_alias()][0]
+        assert header.get_alias_translation(typedef.get_alias()) is first.value
+    assert header.get_alias_translation('CefUnknown') is None
+
+
+def test_added_data():
+    header = parse_headers(False, False)
+    header.add_data('cef_added.h', """
+///
+/// Added class.
+///
+/*--cef(source=library)--*/
+class CefAdded : public CefBaseRefCounted {};
+
+typedef CefAdded CefAddedAlias;
+""")
+    cls = header.get_class('CefAdded')
+    assert cls is header.get_classes()[-1]
+    assert header.get_classes('cef_added.h') == [cls]
+    typedef = header.get_typedefs()[-1]
+    assert typedef.get_alias() == 'CefAddedAlias'
+    assert header.get_alias_translation('CefAddedAlias') is typedef.value
@@ -0,0 +1,36 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import json
+import os
+
+from conftest import parse_headers
+from make_interop import make_type_usage_table
+
+
+def test_dump_type_usage(generator, tmp_path):
+    # the index only needs the parsed headers
+    path = str(tmp_path / 'usage.json')
+    result = generator('--dump-type-usage', path)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert os.listdir(str(tmp_path)) == ['usage.json']
+
+    with open(path) as f:
+        table = json.load(f)
+    assert sorted(table.keys()) == ['attrib', 'ptr_type', 'result_type',
+                                    'type', 'vector_type']
+    frame = table['ptr_type']['CefFrame']
+    assert 'CefBrowser::GetMainFrame()' in frame
+    assert 'CefLoadHandler::OnLoadEnd(frame)' in frame
+    assert 'CefFrameHandler::OnMainFrameChanged(new_frame)' in frame
+    assert table['attrib']['count_func'] == [
+        'CefBrowser::GetFrameIdentifiers()',
+        'CefPrintSettings::GetPageRanges()',
+        'CefPostData::GetElements()',
+        'CefX509Certificate::GetDEREncodedIssuerChain()',
+        'CefX509Certificate::GetPEMEncodedIssuerChain()']
+
+
+def test_streaming():
+    assert make_type_usage_table(parse_headers(False, True, True)) == \
+        make_type_usage_table(parse_headers())
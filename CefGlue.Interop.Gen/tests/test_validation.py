@@ -0,0 +1,43 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import pytest
+
+from cef_parser import obj_header
+
+FUNCTION = """
+///
+/// Returns the ranges.
+///
+/*--cef(%s)--*/
+void CefGetRanges(std::vector<CefRange>& ranges);
+"""
+
+CLASS = """
+///
+/// Class with ranges.
+///
+/*--cef(source=library)--*/
+class CefRanges : public CefBaseRefCounted {
+ public:
+  ///
+  /// Returns the ranges.
+  ///
+  /*--cef(%s)--*/
+  virtual void GetRanges(std::vector<CefRange>& ranges) = 0;
+};
+"""
+
+
+@pytest.mark.parametrize('data', [FUNCTION, CLASS], ids=['function', 'method'])
+def test_missing_count_func(data):
+    header = obj_header()
+    with pytest.raises(Exception, match="'count_func' attribute is required"):
+        header.add_data('cef_ranges.h', data % '')
+
+
+@pytest.mark.parametrize('data', [FUNCTION, CLASS], ids=['function', 'method'])
+def test_count_func(data):
+    header = obj_header()
+    header.add_data('cef_ranges.h', data % 'count_func=ranges:GetRangesCount')
+    assert len(header.get_funcs()) + len(header.get_classes()) == 1
@@ -0,0 +1,59 @@
+#
+# Copyright (C) Xilium CefGlue Project
+#
+import pytest
+
+import make_interop
+import schema
+from conftest import assert_same_outputs, parse_headers
+from make_interop import clear_layout_caches, get_funcs, make_vtable_layout
+
+
+@pytest.fixture(scope='module')
+def header():
+    header = parse_headers(False, False)
+    schema.load('cef3', header)
+    clear_layout_caches()
+    return header
+
+
+def test_layout(header):
+    cls = header.get_class('CefRequestContext')
+    funcs = get_funcs(cls)
+    # the base functions, then the functions of CefPreferenceManager
+    names = [x['name'] for x in funcs]
+    assert names[:5] == ['AddRef', 'Release', 'HasOneRef', 'HasAtLeastOneRef',
+                         'HasPreference']
+    assert [x['slot'] for x in funcs] == ['%x' % i for i in range(len(funcs))]
+    assert len(funcs) == 4 + \
+        len(header.get_class('CefPreferenceManager').get_virtual_funcs()) + \
+        len(cls.get_virtual_funcs())
+
+    own = get_funcs(cls, False, False)
+    assert [x['name'] for x in own] == \
+        [x.get_name() for x in cls.get_virtual_funcs()]
+
+
+def test_computed_once(header):
+    cls = header.get_class('CefBrowserHost')
+    funcs = get_funcs(cls)
+    assert get_funcs(cls) is funcs
+    assert make_vtable_layout(cls, True, True) == funcs
+
+
+def test_clear(header):
+    get_funcs(header.get_class('CefApp'))
+    assert len(make_interop.vtable_layouts) > 0
+    assert len(make_interop.func_parts_cache) > 0
+    clear_layout_caches()
+    assert make_interop.vtable_layouts == {}
+    assert make_interop.func_parts_cache == {}
+
+
+def test_streaming(serial_outputs, generator, tmp_path):
+    # the layouts are cleared after the classes of each header file
+    out = str(tmp_path / 'out')
+    result = generator('--cefglue-dir', out, '--no-backup', '--no-templates',
+                       '--streaming')
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert_same_outputs(serial_outputs[0], out)
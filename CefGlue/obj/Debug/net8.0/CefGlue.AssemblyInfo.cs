@@ -0,0 +1,26 @@
+//------------------------------------------------------------------------------
+// <auto-generated>
+//     This code was generated by a tool.
+//
+//     Changes to this file may cause incorrect behavior and will be lost if
+//     the code is regenerated.
+// </auto-generated>
+//------------------------------------------------------------------------------
+
+using System;
+using System.Reflection;
+
+[assembly: System.Reflection.AssemblyCompanyAttribute("XiliumHQ,OutSystems")]
+[assembly: System.Reflection.AssemblyConfigurationAttribute("Debug")]
+[assembly: System.Reflection.AssemblyCopyrightAttribute("Copyright © XiliumHQ 2021. Copyright © OutSystems 2021.")]
+[assembly: System.Reflection.AssemblyDescriptionAttribute("CefGlue is a .NET binding for The Chromium Embedded Framework (CEF) by Marshall A" +
+    ". Greenblatt.")]
+[assembly: System.Reflection.AssemblyFileVersionAttribute("120.6099.211.0")]
+[assembly: System.Reflection.AssemblyInformationalVersionAttribute("120.6099.211+36f358dc2d2e7d2ccee03b64f4be038e500f91dc")]
+[assembly: System.Reflection.AssemblyProductAttribute("CefGlue")]
+[assembly: System.Reflection.AssemblyTitleAttribute("CefGlue")]
+[assembly: System.Reflection.AssemblyVersionAttribute("120.6099.211.0")]
+[assembly: System.Reflection.AssemblyMetadataAttribute("RepositoryUrl", "https://github.com/OutSystems/CefGlue")]
+
+// Generated by the MSBuild WriteCodeFragment class.
+